@@ -16,3 +16,33 @@
 #   along with this program; if not, write to the Free Software
 #   Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA
 #   02110-1301 USA.
+
+"""Greenland -- a Python based scripting environment.
+
+Subpackages and submodules are not imported with their package, but
+on first access as attribute (PEP 562): `import greenland` is cheap
+and `greenland.errors` imports :py:mod:`greenland.errors` when it is
+used the first time.
+"""
+
+def lazy_submodules(package,names):
+
+    """Return the functions `__getattr__` and `__dir__` for the package
+    named `package`, importing the submodules `names` on first
+    access (PEP 562)."""
+
+    names = frozenset(names)
+
+    def __getattr__(name):
+        if name in names:
+            import importlib
+            return importlib.import_module(package + "." + name)
+        raise AttributeError("module {!r} has no attribute {!r}".format(package,name))
+
+    def __dir__():
+        import sys
+        return sorted(set(vars(sys.modules[package])) | names)
+
+    return __getattr__, __dir__
+
+__getattr__, __dir__ = lazy_submodules(__name__,('errors','example','introspection','templates','testing'))
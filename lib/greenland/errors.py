@@ -30,10 +30,60 @@ import greenland.introspection.caller as caller
 errors_with_info = True  #: Include info text into :py:meth:`__str__`.
 errors_with_help = True  #: Include help page into :py:meth:`__str__`.
 
+errors_defer_location = False  #: Only look up the source line of the location when it is used.
+
 def next_stackframe(stackframe, decrement_by = 1):
     if stackframe == None: return None
     return stackframe - decrement_by
 
+def _source_line(location):
+    if location and location.source:
+        return location.source[0].strip()
+    return None
+
+class deferred(object):
+
+    """A non-data descriptor which computes an attribute on first
+       access and then stores it in the instance dictionary, where it
+       shadows the descriptor from then on. On an :py:class:`Error`
+       the stored values are dropped whenever an attribute is set.
+    """
+
+    def __init__(self,compute):
+        self.compute = compute
+        self.name    = compute.__name__
+        self.__doc__ = compute.__doc__
+
+    def __get__(self,instance,owner):
+        if instance is None: return self
+        value = self.compute(instance)
+        instance.__dict__[self.name] = value
+        return value
+
+
+class _Compiled(object):
+
+    """A message, info or help template of an :py:class:`Error` class
+       with the names of the fields it references. Rendering only
+       looks up these fields on the error instance.
+    """
+
+    __slots__ = ('text','fields')
+
+    def __init__(self,text):
+        self.text   = text
+        self.fields = template.fields(text)
+
+    def render(self,error,text=None):
+        values = {}
+        for name in self.fields:
+            try:
+                values[name] = getattr(error,name)
+            except AttributeError:
+                raise KeyError(name)
+        return (text if text is not None else self.text).format_map(values)
+
+
 class Error(Exception):
     
     """
@@ -47,6 +97,102 @@ class Error(Exception):
     info    = None   #: Info template, see `get_info`. This attribute can be left out.
     help    = None   #: Help text template, see `get_help`. This attribute can be left out.
 
+    fields  = None   #: Names of the info fields the constructor provides. If given, the templates are checked against them when the class is defined.
+
+    defer_location = None  #: Per class override of :py:data:`errors_defer_location` (`None`: use the global switch).
+
+    _compiled = {}            # Compiled templates by attribute name, see __init_subclass__.
+    _deferred = ('source',)   # Names of the deferred attributes, see __init_subclass__.
+
+    def __init_subclass__(cls,**kwargs):
+
+        """Compile the templates of a new error class and check them:
+           Templates must be valid format strings, must not use
+           positional fields and, if any class in the MRO declares
+           :py:attr:`fields`, must only reference declared fields,
+           attributes of the class or `location`, `source` and
+           `__info__`. Violations raise :py:class:`BadTemplate`.
+        """
+
+        super().__init_subclass__(**kwargs)
+
+        cls._deferred = tuple(sorted(set( name for klass in cls.__mro__
+                                          for name,value in vars(klass).items() if isinstance(value,deferred) )))
+
+        declared = None
+        for klass in cls.__mro__:
+            names = klass.__dict__.get('fields')
+            if names is not None:
+                declared = (declared or set()) | set(names)
+
+        compiled = {}
+        for name in ('message','info','help'):
+            text = getattr(cls,name)
+            if not text: continue
+            try:
+                compiled[name] = _Compiled(text)
+            except ValueError as problem:
+                raise BadTemplate(classname=cls.__qualname__,template=name,text=text,
+                                  problem=str(problem),__stackframe__=-1)
+            positional = [ f for f in compiled[name].fields if f == "" or f.isdigit() ]
+            if positional:
+                raise BadTemplate(classname=cls.__qualname__,template=name,text=text,
+                                  problem="positional fields are not supported",__stackframe__=-1)
+            if declared is not None:
+                missing = [ f for f in compiled[name].fields
+                            if f not in declared and f not in ('location','source','__info__') and not hasattr(cls,f) ]
+                if missing:
+                    raise BadTemplate(classname=cls.__qualname__,template=name,text=text,
+                                      problem="references field(s) no constructor provides: " + ", ".join(missing),
+                                      __stackframe__=-1)
+        cls._compiled = compiled
+
+    def _render(self,name,text=None):
+        compiled = self._compiled.get(name)
+        raw      = getattr(self,name)
+        if compiled is None or compiled.text is not raw:
+            compiled = _Compiled(raw)       # template replaced on the instance
+        return compiled.render(self,text)
+
+    def _memoized(self,key,render):
+        rendered = self.__dict__.get('_rendered')
+        if rendered is None:
+            rendered = self.__dict__['_rendered'] = {}
+        try:
+            return rendered[key]
+        except KeyError:
+            text = rendered[key] = render()
+            return text
+
+    def reset_rendered(self):
+
+        """Forget the memoized texts (see :py:meth:`__str__`) and the
+           :py:class:`deferred` values. This is only necessary if an
+           object referenced by a template has been mutated in place,
+           setting attributes on the error resets them anyway.
+        """
+
+        self._forget(None)
+
+    def _forget(self,name):
+
+        # Drop what has been computed from the attributes, since the
+        # attribute `name` changes.
+
+        attrs = self.__dict__
+        attrs.pop('_rendered',None)
+        for computed in self._deferred:
+            if computed != name:
+                attrs.pop(computed,None)
+
+    def __setattr__(self,name,value):
+        self._forget(name)
+        super().__setattr__(name,value)
+
+    def __delattr__(self,name):
+        self._forget(name)
+        super().__delattr__(name)
+
     def __init__(self,__stackframe__=-0,location=None,**__info__):
 
         """Construct an :py:class:`Error` instance. 
@@ -81,34 +227,64 @@ class Error(Exception):
         A location captured earlier, e.g. with
         py:mod:`greenland.introspection.caller` can be passed as
         argument `location`. It must be of the type
-        py:data:`greenland.introspection.Location` (a named
-        tuple). This possibility is only of interest to framework
-        writers, too.
+        py:class:`greenland.introspection.caller.Location` (or
+        behave like it). This possibility is only of interest to
+        framework writers, too.
+
+        If location lookup is deferred (see
+        :py:data:`errors_defer_location` and
+        :py:attr:`defer_location`) only file and line number are
+        recorded here and :py:attr:`source` is looked up when it is
+        used for the first time.
 
         """
         
-        self.__dict__.update(__info__)
-        self.__info__ = __info__
-        self.location = location
-        if not location:
-            if __stackframe__ != None:
-                self.location = caller.capture(__stackframe__-1)
-        if self.location:
-            self.source   = self.location.source[0].strip()
-        self.reset_location(self.location)
+        defer = self.defers_location()
+        attrs = self.__dict__     # nothing rendered yet, no need for __setattr__
+        attrs.update(__info__)
+        attrs['__info__'] = __info__
+        if not location and __stackframe__ != None:
+            location = caller.capture(__stackframe__-1,lazy=defer or None)
+        attrs['location'] = location
+        if location and not defer:
+            attrs['source'] = _source_line(location)
+        self.reset_location(location)
+
+    def defers_location(self):
+
+        """Return if the lookup of the source line is deferred for this
+           instance (:py:attr:`defer_location`, falling back to
+           :py:data:`errors_defer_location`).
+        """
+
+        if self.defer_location is None:
+            return errors_defer_location
+        return self.defer_location
+
+    @deferred
+    def source(self):
+
+        """The (stripped) source line at :py:attr:`location`. Only
+           computed on first access if location lookup is deferred.
+        """
+
+        return _source_line(self.location)
 
     def get_message(self):
 
         """This is a test"""
         
-        return self.message.format(**self.__dict__)
+        return self._memoized('message',lambda: self._render('message'))
 
     def get_help(self,sep="\n",prefix=""):
-        if self.help: return template.extract(self.help,sep,prefix).format(**self.__dict__)
+        if self.help: return self._memoized(('help',sep,prefix),lambda: self._render('help',template.extract(self.help,sep,prefix)))
         else:         return None
             
         
     def get_oneline(self):
+        return self._memoized('oneline',self._oneline)
+
+    def _oneline(self):
         if hasattr(self,'location') and self.location != None:
             t = "{file}:{line}: ".format(file=self.location.file,line=self.location.line)
         else:
@@ -120,12 +296,27 @@ class Error(Exception):
         pass
     
     def raise_here(self,__stackframe__=-0):
-        self.location = caller.capture(__stackframe__-1)
-        self.source   = self.location.source[0].strip()
+        self.location = caller.capture(__stackframe__-1,lazy=self.defers_location() or None)
+        if self.defers_location():
+            self.__dict__.pop('source',None)
+        else:
+            self.source   = _source_line(self.location)
         self.reset_location(self.location)
         raise self
 
     def __str__(self):
+
+        """Return message, one line message with location, info and
+           help (the latter two depending on :py:data:`errors_with_info`
+           and :py:data:`errors_with_help`). The texts are memoized on
+           the instance until an attribute of the error is set (e.g. the
+           location by :py:meth:`raise_here`) or
+           :py:meth:`reset_rendered` is called.
+        """
+
+        return self._memoized(('str',errors_with_info,errors_with_help),self._str)
+
+    def _str(self):
         return \
             self.get_message() \
             + (( "\n\n" + self.get_oneline() + "\n\n  " + self.get_info(sep = "\n  ") ) if errors_with_info else ""  ) \
@@ -133,9 +324,25 @@ class Error(Exception):
                
     def get_info(self,sep="\n",prefix=""):
         if self.info:
-            return template.extract(self.info,sep,prefix).format(**self.__dict__)
+            return self._memoized(('info',sep,prefix),lambda: self._render('info',template.extract(self.info,sep,prefix)))
         else:
             return prefix + repr(self.__info__)
+
+
+class BadTemplate(Error):
+
+    """Raised when an :py:class:`Error` class with a broken template is
+       defined."""
+
+    message = "Bad {template} template in class {classname}: {problem}"
+
+    info    = """
+              class   : {classname}
+              template: {template} = {text!r}
+              problem : {problem}
+              """
+
+    fields  = ('classname','template','text','problem')
     
     
 # class SomeError(Error):
@@ -24,22 +24,167 @@
    This module depends on the standard python module `introspect` and
    has not been tested in situations where the information provided
    `introspect` is not available.
+
+   :py:mod:`inspect` and :py:mod:`linecache` are only imported when
+   they are needed (eager capture, source lookup): they are expensive
+   to import and a lazy capture needs neither.
 """
 
-import inspect
-from   collections import namedtuple
+import sys
+
+capture_lazily = True  #: Default for the `lazy` parameter of :py:func:`capture`.
+
+_unresolved = object()
+
+class Location(object):
+
+    """A source location: :py:attr:`file`, :py:attr:`line` and
+       :py:attr:`source` (the list of source lines at the location, as
+       `code_context` in :py:func:`inspect.getouterframes`, or `None`).
+
+       Locations used to be named tuples and still behave like them
+       (unpacking, indexing, comparison with tuples), but use
+       `__slots__` and only store a single source line as string.
+    """
+
+    __slots__ = ('file','line','code','_source')
+
+    _fields = ('file','line','source')
+
+    def __init__(self,file,line,source=None,code=None):
+        self.file    = file
+        self.line    = line
+        self.code    = code
+        self._source = self._pack(source)
+
+    @staticmethod
+    def _pack(source):
+        if source is None or source is _unresolved: return source
+        if len(source) == 1:                        return source[0]
+        return tuple(source)
+
+    @property
+    def source(self):
+        source = self._source
+        if source is None:         return None
+        if type(source) is str:    return [source]
+        return list(source)
+
+    def _replace(self,**fields):
+        values = dict(zip(self._fields,self))
+        values.update(fields)
+        return Location(code=self.code,**values)
+
+    def _asdict(self):
+        return dict(zip(self._fields,self))
+
+    def __iter__(self):
+        return iter((self.file,self.line,self.source))
+
+    def __len__(self):
+        return 3
+
+    def __getitem__(self,index):
+        return tuple(self)[index]
+
+    def __eq__(self,other):
+        if isinstance(other,(Location,tuple)):
+            return tuple(self) == tuple(other)
+        return NotImplemented
+
+    def __hash__(self):
+
+        # Equal to a tuple only if that is hashable, i.e. if the source
+        # is None: hash like (file, line, None) without resolving the
+        # source of a LazyLocation.
+
+        return hash((self.file,self.line,None))
 
-Location = namedtuple('Location',['file','line','source']) #: A named tuple type describing a source location.
+    def __getstate__(self):
+        return (self.file,self.line,self.source)
 
-def capture( depth = -1):
+    def __setstate__(self,state):
+        self.file, self.line, source = state
+        self.code    = None
+        self._source = self._pack(source)
+
+    def __repr__(self):
+        return "Location(file={!r}, line={!r}, source={!r})".format(*self)
+
+
+class LazyLocation(Location):
+
+    """A :py:class:`Location` that only records file, line number and
+       code object when captured. The source line is looked up (via
+       :py:mod:`linecache`) when :py:attr:`source` is accessed for the
+       first time.
+    """
+
+    __slots__ = ()
+
+    def __init__(self,file,line,code=None):
+        self.file    = file
+        self.line    = line
+        self.code    = code
+        self._source = _unresolved
+
+    @property
+    def source(self):
+        if self._source is _unresolved:
+            import linecache
+            text = linecache.getline(self.file,self.line)
+            self._source = text if text else None
+        return Location.source.fget(self)
+
+    def __repr__(self):
+        return "LazyLocation(file={!r}, line={!r})".format(self.file,self.line)
+
+
+def _walk_frames(steps):
+
+    """Return the frame `steps` frames above the function calling
+       `_walk_frames`, following `f_back`.
+    """
+
+    import inspect
+    frame = inspect.currentframe().f_back
+    for _ in range(steps):
+        frame = frame.f_back
+    return frame
+
+if hasattr(sys,'_getframe'):
+    _outer_frame = lambda steps: sys._getframe(steps+1)  # the same as _walk_frames, but in C
+else:
+    _outer_frame = _walk_frames
+
+
+def capture( depth = -1, lazy = None ):
 
     """Capture a location from the stack. Passing `depth = -1` (the
        default) captures the location of the caller of the code
        calling `capture`. On the other side `depth = -2` captures the
        information from the stack frame above this (one call earlier)
        and so on for all negative values of `depth`).
+
+       If `lazy` is true (the default is :py:data:`capture_lazily`)
+       the stack is walked along `f_back` only as far as necessary
+       and a :py:class:`LazyLocation` is returned, so the cost does
+       not depend on the depth of the stack. Otherwise all outer
+       frames are inspected with :py:func:`inspect.getouterframes`
+       and a :py:class:`Location` is returned.
     """
-    
+
+    if lazy is None:
+        lazy = capture_lazily
+
+    if lazy:
+        frame = _outer_frame(-depth+1)
+        code  = frame.f_code
+        info  = LazyLocation(code.co_filename,frame.f_lineno,code)
+        del frame
+        return info
+
+    import inspect
     frame    = inspect.currentframe()
     frames   = inspect.getouterframes(frame)
     captured = frames[-depth+1]
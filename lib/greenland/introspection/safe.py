@@ -18,26 +18,49 @@
 #   02110-1301 USA.
 
 
+import time
+
 class Result(object):
+
+    """The outcome of :py:func:`apply`: either a :py:class:`Value` or an
+       :py:class:`Excn`. `Type` is the class of the result.
+    """
+
+    __slots__ = ('value',)
+
     def __init__(self,Class,value):
-        self.Type  = Class
         self.value = value
 
+    @property
+    def Type(self):
+        return self.__class__
+
+    def __getstate__(self):
+        return (self.value,)
+
+    def __setstate__(self,state):
+        self.value, = state
+
     def __repr__(self):
         return self.__class__.__name__ + "(" + repr(self.value)+")"
 
         
 class Value(Result):
 
+    __slots__ = ()
+
     def __init__(self,value):
-        super(Value,self).__init__(Value,value)
+        self.value = value
 
     def resurrect(self):
         return self.value        
         
 class Excn(Result):        
+
+    __slots__ = ()
+
     def __init__(self,ex):
-        super(Excn,self).__init__(Excn,ex)
+        self.value = ex
 
     def resurrect(self):
         raise self.value
@@ -48,3 +71,27 @@ def apply(callee,*pargs,**kwargs):
         return Value(value)
     except Exception as ex:
         return Excn(ex)
+
+def apply_timed(callee,*pargs,**kwargs):
+
+    """Like :py:func:`apply`, but return a triple (`result`, `wall`,
+       `cpu`) with the wall clock time and the CPU time of the calling
+       thread spent in `callee` (in seconds)."""
+
+    wall, cpu = time.perf_counter(), time.thread_time()
+    result    = apply(callee,*pargs,**kwargs)
+    return result, time.perf_counter() - wall, time.thread_time() - cpu
+
+async def apply_async(callee,*pargs,**kwargs):
+
+    """Like :py:func:`apply`, but if `callee` returns an awaitable
+       (e.g. is a coroutine function) the awaitable is awaited and
+       its outcome is captured instead."""
+
+    try: 
+        value = callee(*pargs,**kwargs)
+        if hasattr(type(value),'__await__'):
+            value = await value
+        return Value(value)
+    except Exception as ex:
+        return Excn(ex)
@@ -16,3 +16,10 @@
 #   along with this program; if not, write to the Free Software
 #   Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA
 #   02110-1301 USA.
+
+"""Text templates. Submodules are imported on first access (see
+:py:func:`greenland.lazy_submodules`)."""
+
+from greenland import lazy_submodules
+
+__getattr__, __dir__ = lazy_submodules(__name__,('summary','text'))
@@ -0,0 +1,146 @@
+#
+#   Greenland -- a Python based scripting environment.
+#   Copyright (C) 2015-2017  M E Leypold.
+#
+#   This program is free software; you can redistribute it and/or
+#   modify it under the terms of the GNU General Public License as
+#   published by the Free Software Foundation; either version 2 of the
+#   License, or (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program; if not, write to the Free Software
+#   Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA
+#   02110-1301 USA.
+
+"""\
+
+Bounded representations of values for messages: large values are
+summarized instead of being rendered in full.
+
+"""
+
+import zlib
+import reprlib
+import builtins
+
+
+class Summarizer(reprlib.Repr):
+
+    """A :py:class:`reprlib.Repr` with more generous limits, which
+    summarizes strings and buffers longer than :py:attr:`buffer_limit`
+    by type, length, CRC32 and head, and objects with a large `shape`
+    (arrays, data frames) by type and shape. All limits can be passed
+    as keyword arguments.
+    """
+
+    buffer_limit = 256    #: Strings and buffers longer than this are summarized.
+    head         = 32     #: Length of the head shown of summarized buffers.
+    shape_limit  = 1000   #: Objects with a shape with more elements than this are summarized.
+
+    def __init__(self,**limits):
+        super(Summarizer,self).__init__()
+        self.maxlevel  = 4
+        self.maxdict   = 10
+        self.maxlist   = 20
+        self.maxtuple  = 20
+        self.maxset    = 20
+        self.maxstring = 120
+        self.maxother  = 120
+        for name,value in limits.items():
+            if not hasattr(self,name):
+                raise TypeError("unknown limit: {}".format(name))
+            setattr(self,name,value)
+
+    def buffer(self,x,data):
+        return "<{} len={} crc32={:08x} head={}>".format(
+            type(x).__name__,len(x),zlib.crc32(data),builtins.repr(x[:self.head])
+        )
+
+    def repr_str(self,x,level):
+        if len(x) > self.buffer_limit:
+            return self.buffer(x,x.encode('utf-8','surrogatepass'))
+        return super(Summarizer,self).repr_str(x,level)
+
+    def repr_bytes(self,x,level):
+        if len(x) > self.buffer_limit:
+            return self.buffer(x,x)
+        return builtins.repr(x)
+
+    repr_bytearray = repr_bytes
+
+    def repr_memoryview(self,x,level):
+        if x.nbytes > self.buffer_limit:
+            data = x.tobytes()
+            return "<memoryview nbytes={} crc32={:08x} head={}>".format(x.nbytes,zlib.crc32(data),builtins.repr(data[:self.head]))
+        return builtins.repr(x)
+
+    def repr_instance(self,x,level):
+        shape = getattr(x,'shape',None)
+        if isinstance(shape,tuple) and all(isinstance(n,int) for n in shape):
+            size = 1
+            for n in shape: size *= n
+            if size > self.shape_limit:
+                return "<{} shape={}>".format(type(x).__name__,shape)
+        return super(Summarizer,self).repr_instance(x,level)
+
+
+summarizer = Summarizer()   #: The default summarizer.
+
+def summarize(value):
+
+    """Return the bounded representation of `value` by the default
+    :py:data:`summarizer`."""
+
+    return summarizer.repr(value)
+
+
+_sequences = (str,bytes,bytearray,list,tuple)
+
+def first_mismatch(a,b,chunk=4096):
+
+    """Return the first index where the sequences `a` and `b` differ
+    (the length of the shorter one, if it is a prefix of the other),
+    `None` if they are equal. Compares chunk wise, so large buffers
+    are compared at C speed.
+    """
+
+    n = min(len(a),len(b))
+    for start in range(0,n,chunk):
+        end = min(start+chunk,n)
+        if a[start:end] != b[start:end]:
+            for i in range(start,end):
+                if a[i] != b[i]:
+                    return i
+    if len(a) != len(b):
+        return n
+    return None
+
+def first_difference(expected,actual,context=16,summarizer=summarizer):
+
+    """Describe the first differing region of the sequences (strings,
+    buffers, lists or tuples) `expected` and `actual`, showing
+    `context` elements on either side. Return `None` if the values
+    are no sequences of the same kind or do not differ.
+    """
+
+    if not (isinstance(expected,_sequences) and isinstance(actual,_sequences)):
+        return None
+    if isinstance(expected,(str,bytes,bytearray)) != isinstance(actual,(str,bytes,bytearray)):
+        return None
+    try:
+        i = first_mismatch(expected,actual)
+    except TypeError:
+        return None
+    if i is None:
+        return None
+    start = max(0,i-context)
+    return "at index {}: expected[{}:{}] = {}, actual[{}:{}] = {}".format(
+        i,
+        start,i+context,summarizer.repr(expected[start:i+context]),
+        start,i+context,summarizer.repr(actual[start:i+context]),
+    )
@@ -18,18 +18,42 @@
 #   02110-1301 USA.
 
 
-import re
+# Neither `re` nor `string` are imported here: templates are compiled
+# when error classes are defined, i.e. on import of every module
+# defining errors, and both modules are expensive to import. Format
+# strings are parsed with `_string`, the built in parser behind
+# `string.Formatter`. It is private, but the public Formatter.parse()
+# is a thin wrapper around it, it is built in (nothing to import) and
+# it follows the format syntax of the running interpreter by
+# definition, which a parser of our own would have to be kept up with.
 
-EMPTY = re.compile("^[ \t]*$")
-WS    = re.compile("^[ \t]*")
+from   _string   import formatter_parser, formatter_field_name_split
+from   functools import lru_cache
+
+def __getattr__(name):
+
+    # The regular expressions once used by extract_lines(), compiled on
+    # demand (PEP 562).
+
+    if name in ('EMPTY','WS'):
+        import re
+        globals().update( EMPTY = re.compile("^[ \t]*$"), WS = re.compile("^[ \t]*") )
+        return globals()[name]
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__,name))
+
+def _empty(line):
+    return not line.strip(" \t")
+
+def _indentation(line):
+    return len(line) - len(line.lstrip(" \t"))
 
 def extract_lines(text):
     
     line = text.split("\n")    
-    first_was_empty = len(line)>0 and EMPTY.match(line[0])
-    while len(line)>0 and EMPTY.match(line[0]):
+    first_was_empty = len(line)>0 and _empty(line[0])
+    while len(line)>0 and _empty(line[0]):
         del line[0]
-    while len(line)>0 and EMPTY.match(line[-1]):
+    while len(line)>0 and _empty(line[-1]):
         del line[-1]        
 
     if len(line) == 0: return line
@@ -37,13 +61,69 @@ def extract_lines(text):
     if not first_was_empty:
         indentation = 0
         if len(line)>1:
-            indentation = len( WS.match(line[1]).group(0) )
+            indentation = _indentation(line[1])
         first = line[0]
     else:
-        indentation = len( WS.match(line[0]).group(0) )
+        indentation = _indentation(line[0])
         first       = line[0][indentation:]
 
     return [ first ] + [ l[indentation:] for l in line[1:] ]
 
+class Template(object):
+
+    """A text template that has been dedented once (see
+       :py:func:`extract_lines`). The joined text is remembered per
+       `sep` and `prefix`, so extracting the same template repeatedly
+       is a dictionary lookup.
+    """
+
+    __slots__ = ('lines','_joined')
+
+    max_variants = 16  #: How many (`sep`, `prefix`) variants to remember per template.
+
+    def __init__(self,text):
+        self.lines   = tuple(extract_lines(text))
+        self._joined = {}
+
+    def extract(self, sep='\n', prefix=""):
+        key = (sep,prefix)
+        try:
+            return self._joined[key]
+        except KeyError:
+            pass
+        joined = prefix + (sep+prefix).join(self.lines)
+        if len(self._joined) >= self.max_variants:
+            self._joined.clear()
+        self._joined[key] = joined
+        return joined
+
+@lru_cache(maxsize=512)
+def compiled(text):
+
+    """Return the :py:class:`Template` for `text`. Compiled templates
+       are kept in an LRU cache of the 512 most recently used.
+    """
+
+    return Template(text)
+
 def extract(text, sep='\n', prefix=""):
-    return prefix + (sep+prefix).join(extract_lines(text))
+    return compiled(text).extract(sep,prefix)
+
+
+def fields(text):
+
+    """Return the names of the fields referenced by the format string
+       `text` (without attribute access and indexing, i.e. `{a.b[0]}`
+       references `a`), in order of first occurence. Raises
+       :py:exc:`ValueError` if `text` is not a valid format string.
+    """
+
+    names = []
+    for _, name, spec, _ in formatter_parser(text):
+        if name is None: continue
+        root = str(formatter_field_name_split(name)[0])
+        if root not in names:
+            names.append(root)
+        if spec:
+            names.extend(n for n in fields(spec) if n not in names)
+    return tuple(names)
@@ -0,0 +1,28 @@
+#
+#   Greenland -- a Python based scripting environment.
+#   Copyright (C) 2015-2017  M E Leypold.
+#
+#   This program is free software; you can redistribute it and/or
+#   modify it under the terms of the GNU General Public License as
+#   published by the Free Software Foundation; either version 2 of the
+#   License, or (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program; if not, write to the Free Software
+#   Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA
+#   02110-1301 USA.
+
+"""Testing infrastructure. Submodules are imported on first access
+(see :py:func:`greenland.lazy_submodules`), so e.g. the runner
+(:py:mod:`greenland.testing.run`) does not load the framework."""
+
+from greenland import lazy_submodules
+
+__getattr__, __dir__ = lazy_submodules(__name__,(
+    'diff','examples','expectations','framework','infix_syntax','measurements','run','simple','sinks','track'
+))
@@ -0,0 +1,299 @@
+#
+#   Greenland -- a Python based scripting environment.
+#   Copyright (C) 2015-2017  M E Leypold.
+#
+#   This program is free software; you can redistribute it and/or
+#   modify it under the terms of the GNU General Public License as
+#   published by the Free Software Foundation; either version 2 of the
+#   License, or (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program; if not, write to the Free Software
+#   Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA
+#   02110-1301 USA.
+
+"""\
+
+Structural differences between (nested) expected and actual values,
+as shown by :py:class:`~greenland.testing.expectations.UnexpectedResult`.
+
+Mappings are compared by their key sets and then value by value,
+sets by set difference and sequences (lists and tuples) by first
+stripping the common prefix and suffix and then splitting the
+remaining region at the elements that occur exactly once on both
+sides (patience diff). Elements are matched by value, or by
+fingerprint (a hash computed structurally) if they are unhashable.
+The regions in between are matched with
+:py:class:`difflib.SequenceMatcher` if they are small (see
+:py:data:`matcher_limit`) and compared position by position
+otherwise, so the work stays roughly linear. Everything else is
+compared as a whole. The search stops after `limit` differences.
+
+"""
+
+import bisect
+
+from   collections.abc import Mapping, Set
+
+import greenland.templates.summary as summary
+
+
+default_limit    = 20    #: Number of differences after which :py:func:`diff` stops.
+matcher_limit    = 4096  #: Regions of sequences with a larger product of lengths are not matched with difflib.
+positional_limit = 3     #: Regions of sequences of the same length with more differences are matched, not compared position by position.
+
+containers       = (Mapping,Set,list,tuple)  #: The types :py:func:`diff` looks into.
+
+class Difference(object):
+
+    """A single difference at `path` (a tuple of keys and indices):
+    `kind` is `"changed"`, `"missing"` (only in expected) or `"extra"`
+    (only in actual)."""
+
+    __slots__ = ('path','kind','expected','actual')
+
+    def __init__(self,path,kind,expected=None,actual=None):
+        self.path     = path
+        self.kind     = kind
+        self.expected = expected
+        self.actual   = actual
+
+    def where(self):
+        return "".join( "[{!r}]".format(key) for key in self.path ) or "(value)"
+
+    def render(self,summarizer=summary.summarizer):
+        if self.kind == "missing":
+            return "{}: missing, expected {}".format(self.where(),summarizer.repr(self.expected))
+        if self.kind == "extra":
+            return "{}: unexpected {}".format(self.where(),summarizer.repr(self.actual))
+        return "{}: expected {}, actual {}".format(self.where(),summarizer.repr(self.expected),summarizer.repr(self.actual))
+
+    def __repr__(self):
+        return "Difference({!r}, {!r}, {!r}, {!r})".format(self.path,self.kind,self.expected,self.actual)
+
+
+class Diff(object):
+
+    """The differences found by :py:func:`diff` and whether the
+    search has been `truncated` after `limit` differences."""
+
+    __slots__ = ('differences','truncated','limit')
+
+    def __init__(self,limit):
+        self.differences = []
+        self.truncated   = False
+        self.limit       = limit
+
+    def add(self,*difference):
+        if len(self.differences) >= self.limit:
+            self.truncated = True
+            raise _Enough()
+        self.differences.append(Difference(*difference))
+
+    def __len__(self):
+        return len(self.differences)
+
+    def __iter__(self):
+        return iter(self.differences)
+
+    def render(self,sep="\n",summarizer=summary.summarizer):
+        lines = [ difference.render(summarizer) for difference in self.differences ]
+        if self.truncated:
+            lines.append("(more differences after the first {})".format(self.limit))
+        return sep.join(lines)
+
+class _Enough(Exception):
+    pass
+
+
+def fingerprint(value):
+
+    """Return a hash of `value`, computed structurally for (unhashable)
+    lists, dictionaries and sets, so equal values have the same
+    fingerprint."""
+
+    try:
+        return hash(value)
+    except TypeError:
+        pass
+    if isinstance(value,Mapping):
+        return hash(frozenset( (key,fingerprint(item)) for key,item in value.items() ))
+    if isinstance(value,(list,tuple)):
+        return hash(( type(value).__name__, ) + tuple( fingerprint(item) for item in value ))
+    if isinstance(value,Set):
+        return hash(frozenset( fingerprint(item) for item in value ))
+    return id(value)
+
+def _differ(a,b):
+    try:
+        return bool(a != b)
+    except Exception:           # e.g. element wise comparing arrays
+        return a is not b
+
+def diff(expected,actual,limit=None):
+
+    """Return the :py:class:`Diff` of `expected` and `actual`, with at
+    most `limit` (default :py:data:`default_limit`) differences."""
+
+    result = Diff(default_limit if limit is None else limit)
+    try:
+        _diff(expected,actual,(),result)
+    except _Enough:
+        pass
+    return result
+
+def _diff(expected,actual,path,result):
+    if expected is actual or not _differ(expected,actual):
+        return
+    if isinstance(expected,Mapping) and isinstance(actual,Mapping):
+        _diff_mappings(expected,actual,path,result)
+    elif isinstance(expected,Set) and isinstance(actual,Set):
+        for item in expected - actual:
+            result.add(path,"missing",item,None)
+        for item in actual - expected:
+            result.add(path,"extra",None,item)
+    elif isinstance(expected,(list,tuple)) and isinstance(actual,(list,tuple)) and type(expected) == type(actual):
+        _diff_sequences(expected,actual,path,result)
+    else:
+        result.add(path,"changed",expected,actual)
+
+def _diff_mappings(expected,actual,path,result):
+    for key in expected:
+        if key not in actual:
+            result.add(path+(key,),"missing",expected[key],None)
+        else:
+            _diff(expected[key],actual[key],path+(key,),result)
+    for key in actual:
+        if key not in expected:
+            result.add(path+(key,),"extra",None,actual[key])
+
+def _key(value):
+
+    # Elements are matched by value where they are hashable, else by
+    # fingerprint. Matched elements are compared again with _diff, so
+    # fingerprint collisions are reported, not taken as equality.
+
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return _Fingerprinted(value)
+
+class _Fingerprinted(object):
+
+    __slots__ = ('hash',)
+
+    def __init__(self,value):
+        self.hash = fingerprint(value)
+
+    def __hash__(self):
+        return self.hash
+
+    def __eq__(self,other):
+        return isinstance(other,_Fingerprinted) and other.hash == self.hash
+
+def _anchors(expected,actual,i1,i2,j1,j2):
+
+    # Pairs (i, j) of elements occurring exactly once in both regions,
+    # the longest run of them in the same order (patience diff).
+
+    seen = {}
+    for i in range(i1,i2):
+        entry = seen.setdefault(_key(expected[i]),[0,i,0,None])
+        entry[0] += 1
+    for j in range(j1,j2):
+        entry = seen.get(_key(actual[j]))
+        if entry is not None:
+            entry[2] += 1
+            entry[3] = j
+    pairs = sorted( (i,j) for count,i,count_actual,j in seen.values() if count == 1 and count_actual == 1 )
+
+    tails, links, indices = [], [], []        # longest increasing subsequence by j
+    for n,(i,j) in enumerate(pairs):
+        k = bisect.bisect_left(tails,j)
+        links.append(indices[k-1] if k else None)
+        if k == len(tails):
+            tails.append(j)
+            indices.append(n)
+        else:
+            tails[k], indices[k] = j, n
+    anchors, n = [], indices[-1] if indices else None
+    while n is not None:
+        anchors.append(pairs[n])
+        n = links[n]
+    anchors.reverse()
+    return anchors
+
+def _diff_sequences(expected,actual,path,result):
+    _diff_region(expected,actual,0,len(expected),0,len(actual),path,result,anchored=True)
+
+def _diff_region(expected,actual,i1,i2,j1,j2,path,result,anchored=False):
+
+    # Strip the common prefix and suffix, then: compare regions of the
+    # same length with only a few differences position by position,
+    # split other regions at unique elements (only at the top level,
+    # so the work stays linear), match small regions with difflib and
+    # compare large ones positionally.
+
+    while i1 < i2 and j1 < j2 and not _differ(expected[i1],actual[j1]):
+        i1 += 1
+        j1 += 1
+    while i1 < i2 and j1 < j2 and not _differ(expected[i2-1],actual[j2-1]):
+        i2 -= 1
+        j2 -= 1
+
+    if i1 < i2 and j1 < j2 and (i2-i1 != j2-j1 or _mismatches(expected,actual,i1,i2,j1) > positional_limit):
+        if anchored:
+            anchors = _anchors(expected,actual,i1,i2,j1,j2)
+            if anchors:
+                for i,j in anchors:
+                    _diff_region(expected,actual,i1,i,j1,j,path,result)
+                    _diff(expected[i],actual[j],path+(i,),result)
+                    i1, j1 = i+1, j+1
+                _diff_region(expected,actual,i1,i2,j1,j2,path,result)
+                return
+        if (i2-i1) * (j2-j1) <= matcher_limit:
+            _match_region(expected,actual,i1,i2,j1,j2,path,result)
+            return
+
+    _positional(expected,actual,i1,i2,j1,j2,path,result)
+
+def _mismatches(expected,actual,i1,i2,j1):
+
+    # The number of positions at which the regions differ, counted up
+    # to one more than positional_limit.
+
+    count = 0
+    for k in range(i2-i1):
+        if _differ(expected[i1+k],actual[j1+k]):
+            count += 1
+            if count > positional_limit:
+                break
+    return count
+
+def _positional(expected,actual,i1,i2,j1,j2,path,result):
+    paired = min(i2-i1,j2-j1)
+    for k in range(paired):
+        _diff(expected[i1+k],actual[j1+k],path+(i1+k,),result)
+    for i in range(i1+paired,i2):
+        result.add(path+(i,),"missing",expected[i],None)
+    for j in range(j1+paired,j2):
+        result.add(path+(j,),"extra",None,actual[j])
+
+def _match_region(expected,actual,i1,i2,j1,j2,path,result):
+    import difflib
+
+    matcher = difflib.SequenceMatcher(
+        None,[ _key(e) for e in expected[i1:i2] ],[ _key(a) for a in actual[j1:j2] ],autojunk=False
+    )
+    for tag,k1,k2,l1,l2 in matcher.get_opcodes():
+        if tag == "equal":
+            for k in range(k2-k1):
+                _diff(expected[i1+k1+k],actual[j1+l1+k],path+(i1+k1+k,),result)
+        else:
+            _positional(expected,actual,i1+k1,i1+k2,j1+l1,j1+l2,path,result)
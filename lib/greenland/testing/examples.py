@@ -21,8 +21,20 @@
 import re
 import subprocess
 import os
+import sys
+import json
+import time
+import runpy
+import atexit
+import signal
+import hashlib
+import tempfile
+import importlib
+import threading
+from   queue      import Queue, Empty
 from   subprocess import PIPE
-from   greenland.errors import Error
+from   concurrent.futures import ThreadPoolExecutor
+from   greenland.errors import Error, next_stackframe
 from   types import FunctionType
 
 class BrokenExample(Error):
@@ -41,30 +53,761 @@ class BrokenExample(Error):
               expected: {spec}
               actual  : {actual}
               """
-    
-def check_examples(examples,basepath="examples"):
-     for example in examples:
-          path   = os.path.join(basepath,example)
-          
-          result = subprocess.run(path,stdout=PIPE,stderr=PIPE)
-
-          expectations = examples[example]
-          
-          for what in expectations:
-               actual = result.__dict__[what]
-               spec   = expectations[what]
-
-               if   type(spec) in [ str, bytes ]:
-                    expected = lambda x: re.compile(spec).search(x)
-               elif type(spec) in [ list ]:
-                    expected = lambda x: x in spec
-               elif type(spec) in [ FunctionType ]:
-                   expected = spec
-               else:
-                   expected = lambda x: x == spec
-                    
-               if not expected(actual):
+
+    fields  = ('path','failed','actual','expected','spec')
+
+class BrokenExamples(Error):
+
+    message = "{count} broken example(s): {paths}"
+
+    help    = """
+              This message is raised when examples are checked
+              without stopping at the first broken example and some
+              of them are broken. The attribute `failures` contains
+              the BrokenExample errors in the order of the examples.
+              """
+
+    info    = """
+              {summary}
+              """
+
+    fields  = ('failures','count','paths','summary')
+
+    def __init__(self,failures,__stackframe__=0,**kwargs):
+        super(BrokenExamples,self).__init__(
+             failures = failures,
+             count    = len(failures),
+             paths    = ", ".join(failure.path for failure in failures),
+             summary  = "\n  ".join("{}: {} (expected: {!r})".format(failure.path,failure.failed,failure.spec)
+                                  for failure in failures),
+             __stackframe__ = next_stackframe(__stackframe__),
+             **kwargs
+        )
+
+class MalformedSpec(Error):
+
+    message = "Malformed expectation for {what!r}: {spec!r} ({problem})"
+
+    help    = """
+              This message is raised when the expectations for an
+              example can not be compiled, e.g. because a regular
+              expression is malformed or the expectation refers to
+              something an example run does not produce. It is raised
+              before any example is run.
+              """
+
+    info    = """
+              what   : {what}
+              spec   : {spec!r}
+              problem: {problem}
+              """
+
+    fields  = ('what','spec','problem')
+
+# Matchers: expectation specs compiled into predicates
+
+class Matches(object):
+
+     """Search for the regular expression `spec`."""
+
+     __slots__ = ('spec','regex')
+
+     def __init__(self,spec):
+          self.spec  = spec
+          self.regex = re.compile(spec)
+
+     def __call__(self,actual):
+          return self.regex.search(actual) is not None
+
+     def __repr__(self):
+          return "Matches({!r})".format(self.spec)
+
+class OneOf(object):
+
+     """Membership in the list `spec` (a set if the items are hashable)."""
+
+     __slots__ = ('spec','values')
+
+     def __init__(self,spec):
+          self.spec = spec
+          try:
+               self.values = frozenset(spec)
+          except TypeError:
+               self.values = list(spec)
+
+     def __call__(self,actual):
+          try:
+               return actual in self.values
+          except TypeError:
+               return actual in self.spec
+
+     def __repr__(self):
+          return "OneOf({!r})".format(self.spec)
+
+class Satisfies(object):
+
+     """The predicate `spec` holds."""
+
+     __slots__ = ('spec',)
+
+     def __init__(self,spec):
+          self.spec = spec
+
+     def __call__(self,actual):
+          return self.spec(actual)
+
+     def __repr__(self):
+          return "Satisfies({!r})".format(self.spec)
+
+class Equals(object):
+
+     """Equality with `spec`."""
+
+     __slots__ = ('spec',)
+
+     def __init__(self,spec):
+          self.spec = spec
+
+     def __call__(self,actual):
+          return actual == self.spec
+
+     def __repr__(self):
+          return "Equals({!r})".format(self.spec)
+
+matchers = (Matches,OneOf,Satisfies,Equals)
+
+def matcher(spec):
+
+     """Compile an expectation `spec` into a matcher (see
+        :py:func:`check_examples` for the meaning of specs). Matchers
+        are passed through unchanged.
+     """
+
+     if   isinstance(spec,matchers):       return spec
+     elif type(spec) in [ str, bytes ]:    return Matches(spec)
+     elif type(spec) in [ list ]:          return OneOf(spec)
+     elif type(spec) in [ FunctionType ]:  return Satisfies(spec)
+     else:                                 return Equals(spec)
+
+results = ('args','returncode','stdout','stderr')  #: What expectations can refer to.
+streams = ('stdout','stderr')
+
+fail_on = 'fail_on'  #: Key of a regular expression that breaks an example if it appears on `stdout` or `stderr`.
+
+def compile_expectations(expectations):
+
+     """Compile the expectations for one example (a dictionary mapping
+        :py:data:`results` and :py:data:`fail_on` to specs) into a
+        tuple of (`what`, matcher) pairs. Raises
+        :py:class:`MalformedSpec` if a spec can not be compiled.
+     """
+
+     compiled = []
+     for what in expectations:
+          spec = expectations[what]
+          if what == fail_on and type(spec) not in [ str, bytes ]:
+               raise MalformedSpec(what=what,spec=spec,problem="must be a regular expression")
+          if what not in results and what != fail_on:
+               raise MalformedSpec(what=what,spec=spec,problem="not one of " + ", ".join(results))
+          try:
+               compiled.append((what,matcher(spec)))
+          except re.error as problem:
+               raise MalformedSpec(what=what,spec=spec,problem=str(problem))
+     return tuple(compiled)
+
+def run_example(path,timeout=None):
+
+     """Run the example at `path` and return the
+        :py:class:`subprocess.CompletedProcess`. If `timeout` (in
+        seconds) is given and the example runs longer it is killed
+        and :py:class:`BrokenExample` is raised.
+     """
+
+     try:
+          return subprocess.run(path,stdout=PIPE,stderr=PIPE,timeout=timeout)
+     except subprocess.TimeoutExpired:
+          raise BrokenExample(
+               path=path,
+               failed="timeout",actual="still running after {}s".format(timeout),expected=None,spec=timeout
+          )
+
+def _pump(pipe,name,queue):
+     while True:
+          chunk = pipe.read1(1 << 16)
+          queue.put((name,chunk))
+          if not chunk: break
+
+def _check_fail_on(path,expected,output):
+     match = expected.regex.search(output)
+     if match:
+          raise BrokenExample(
+               path=path,
+               failed=fail_on,actual=match.group(0),expected=expected,spec=expected.spec
+          )
+
+def stream_example(path,expectations,timeout=None,window=1 << 16):
+
+     """Run the example at `path` and match its output while it
+        arrives. Only the last `window` bytes of `stdout` and `stderr`
+        are kept. Regular expressions on `stdout` and `stderr` are
+        searched in that window whenever output arrives and are met
+        once they have been found. The example is terminated early
+        when a :py:data:`fail_on` expression is found or, if all
+        expectations are such regular expressions (and there is at
+        least one on `stdout` or `stderr`), when all of them are met.
+
+        Returns (`result`, `met`): a
+        :py:class:`subprocess.CompletedProcess` with the retained
+        output and the set of expectations already met.
+     """
+
+     streaming = { what: expected for what,expected in expectations if what in streams and isinstance(expected,Matches) }
+     breaking  = [ expected for what,expected in expectations if what == fail_on ]
+     early     = bool(streaming) and all( what in streaming or what == fail_on for what,_ in expectations )
+     met       = set()
+     deadline  = None if timeout is None else time.monotonic() + timeout
+
+     process   = subprocess.Popen(path,stdout=PIPE,stderr=PIPE)
+     queue     = Queue()
+     output    = { name: bytearray() for name in streams }
+     running   = set(streams)
+
+     for name in streams:
+          threading.Thread(target=_pump,args=(getattr(process,name),name,queue),daemon=True).start()
+
+     try:
+          while running:
+               try:
+                    name,chunk = queue.get(timeout=None if deadline is None else max(0,deadline - time.monotonic()))
+               except Empty:
                     raise BrokenExample(
                          path=path,
-                         failed=what,actual=actual,expected=expected,spec=spec
+                         failed="timeout",actual="still running after {}s".format(timeout),expected=None,spec=timeout
                     )
+               if not chunk:
+                    running.discard(name)
+                    continue
+               buffer = output[name]
+               buffer.extend(chunk)
+               if len(buffer) > window:
+                    del buffer[:len(buffer) - window]
+               for expected in breaking:
+                    _check_fail_on(path,expected,buffer)
+               if name in streaming and name not in met and streaming[name](buffer):
+                    met.add(name)
+               if early and len(met) == len(streaming):
+                    break
+     finally:
+          if process.poll() is None:
+               process.kill()
+          process.wait()
+
+     result = subprocess.CompletedProcess(path,process.returncode,bytes(output['stdout']),bytes(output['stderr']))
+     return result, met
+
+def check_example(path,expectations,timeout=None,stream=False,window=1 << 16):
+
+     """Run the example at `path` and check the `expectations` (see
+        :py:func:`check_examples`, or as compiled by
+        :py:func:`compile_expectations`) on the result. Raises
+        :py:class:`BrokenExample` at the first expectation that is
+        not met. With `stream` the output is matched while the
+        example runs (see :py:func:`stream_example`).
+     """
+
+     if isinstance(expectations,dict):
+          expectations = compile_expectations(expectations)
+
+     if stream:
+          result, met = stream_example(path,expectations,timeout,window)
+     else:
+          result, met = run_example(path,timeout), ()
+
+     verify(path,expectations,result,met)
+
+def verify(path,expectations,result,met=()):
+
+     """Check the compiled `expectations` on the `result` (a
+        :py:class:`subprocess.CompletedProcess`) of the example at
+        `path`, except those already `met`. Raises
+        :py:class:`BrokenExample` at the first expectation that is
+        not met.
+     """
+
+     for what,expected in expectations:
+          if what in met:
+               continue
+
+          if what == fail_on:
+               for name in streams:
+                    _check_fail_on(path,expected,getattr(result,name))
+               continue
+
+          actual = getattr(result,what)
+
+          if not expected(actual):
+               raise BrokenExample(
+                    path=path,
+                    failed=what,actual=actual,expected=expected,spec=expected.spec
+               )
+
+# Fork mode: examples forked from a warm parent
+
+default_preload = ('greenland.errors','greenland.testing.framework')  #: Modules imported before forking examples.
+
+def is_python(path):
+
+     """Return if the example at `path` is a Python script (by suffix
+        or `#!` line)."""
+
+     if path.endswith(".py"):
+          return True
+     try:
+          with open(path,"rb") as script:
+               first = script.readline(256)
+     except OSError:
+          return False
+     return first.startswith(b"#!") and b"python" in first
+
+def _exit_status(code):
+     if code is None:
+          return 0
+     if isinstance(code,int):
+          return code & 0xff
+     print(code,file=sys.stderr)
+     return 1
+
+def _run_forked(path):
+
+     # In the child: run the example as __main__ like the interpreter
+     # would and exit without returning into the parent's code.
+
+     status = 1
+     try:
+          getattr(atexit,'_clear',lambda: None)()          # the parent's handlers
+          sys.argv    = [ path ]
+          sys.path[0] = os.path.dirname(os.path.abspath(path))
+          try:
+               runpy.run_path(os.path.abspath(path),run_name="__main__")
+               status = 0
+          except SystemExit as exit:
+               status = _exit_status(exit.code)
+          except BaseException:
+               sys.excepthook(*sys.exc_info())
+          getattr(atexit,'_run_exitfuncs',lambda: None)()
+     finally:
+          try:
+               sys.stdout.flush()
+               sys.stderr.flush()
+          finally:
+               os._exit(status)
+
+class _Launched(object):
+
+     # A running example: forked if it is a Python script, else
+     # started with subprocess. Output goes to temporary files.
+
+     def __init__(self,path,timeout,fork=True):
+          self.path     = path
+          self.deadline = None if timeout is None else time.monotonic() + timeout
+          self.stdout   = tempfile.TemporaryFile()
+          self.stderr   = tempfile.TemporaryFile()
+          self.returncode = None
+          self.process  = None
+          self.pid      = None
+          if fork:
+               sys.stdout.flush()
+               sys.stderr.flush()
+               pid = os.fork()
+               if pid == 0:
+                    devnull = os.open(os.devnull,os.O_RDONLY)
+                    os.dup2(devnull,0)
+                    os.dup2(self.stdout.fileno(),1)
+                    os.dup2(self.stderr.fileno(),2)
+                    _run_forked(path)
+               self.pid = pid
+          else:
+               self.process = subprocess.Popen(path,stdin=subprocess.DEVNULL,stdout=self.stdout,stderr=self.stderr)
+
+     def poll(self):
+          if self.returncode is None:
+               if self.process is not None:
+                    self.returncode = self.process.poll()
+               else:
+                    pid, status = os.waitpid(self.pid,os.WNOHANG)
+                    if pid:
+                         self.returncode = os.waitstatus_to_exitcode(status)
+          return self.returncode
+
+     def expired(self):
+          return self.deadline is not None and time.monotonic() > self.deadline
+
+     def kill(self):
+          if self.returncode is not None:
+               return
+          if self.process is not None:
+               self.process.kill()
+               self.returncode = self.process.wait()
+          else:
+               os.kill(self.pid,signal.SIGKILL)
+               self.returncode = os.waitstatus_to_exitcode(os.waitpid(self.pid,0)[1])
+
+     def result(self):
+          try:
+               self.stdout.seek(0)
+               self.stderr.seek(0)
+               return subprocess.CompletedProcess(self.path,self.returncode,self.stdout.read(),self.stderr.read())
+          finally:
+               self.close()
+
+     def close(self):
+          self.stdout.close()
+          self.stderr.close()
+
+def fork_examples(paths,workers=1,timeout=None,poll_interval=0.005):
+
+     """Run the examples at `paths`, `workers` at a time, forking
+        Python scripts from this process instead of starting a new
+        interpreter for each. Other examples are started with
+        :py:mod:`subprocess`, and so are all of them while any other
+        thread is running (a forked child could inherit locks held
+        by it). The children are polled every `poll_interval` seconds
+        and killed after `timeout`.
+
+        Forked examples inherit the module state of the caller, e.g.
+        switched off error classes in :py:mod:`greenland.errors` or
+        the default recorder of :py:mod:`greenland.testing.framework`,
+        not that of a fresh interpreter.
+
+        Yields (`path`, `result`) pairs in the order of `paths`, the
+        result being a :py:class:`subprocess.CompletedProcess` or, on
+        timeout, a :py:class:`BrokenExample`. Children still running
+        when the consumer stops are killed.
+     """
+
+     forking = hasattr(os,'fork') and threading.active_count() == 1
+     running, done, upcoming = {}, {}, 0
+     try:
+          for index in range(len(paths)):
+               while index not in done:
+                    while upcoming < len(paths) and len(running) < workers:
+                         path = paths[upcoming]
+                         running[upcoming] = _Launched(path,timeout,fork = forking and is_python(path))
+                         upcoming += 1
+                    for i,child in list(running.items()):
+                         if child.poll() is not None:
+                              done[i] = child.result()
+                         elif child.expired():
+                              child.kill()
+                              child.close()
+                              done[i] = BrokenExample(
+                                   path=child.path,
+                                   failed="timeout",actual="still running after {}s".format(timeout),expected=None,spec=timeout
+                              )
+                         else:
+                              continue
+                         del running[i]
+                    if index not in done:
+                         time.sleep(poll_interval)
+               yield paths[index], done.pop(index)
+     finally:
+          for child in running.values():
+               child.kill()
+               child.close()
+
+# Result cache
+
+class _Uncacheable(Exception):
+     pass
+
+def _value_key(value,visiting):
+     if isinstance(value,FunctionType):
+          return _function_key(value,visiting)
+     text = repr(value)
+     if " at 0x" in text:                  # an identity, not a value
+          raise _Uncacheable(text)
+     return text
+
+def _code_key(code,visiting):
+     consts = [ _code_key(const,visiting) if hasattr(const,'co_code') else _value_key(const,visiting) for const in code.co_consts ]
+     return hashlib.sha256(code.co_code + repr((consts,code.co_names)).encode()).hexdigest()
+
+def _cell_key(cell,visiting):
+     try:
+          contents = cell.cell_contents
+     except ValueError:                    # not bound yet
+          return None
+     return _value_key(contents,visiting)
+
+def _function_key(function,visiting):
+
+     # A predicate is keyed by its code and everything it can see:
+     # defaults, closure cells and the globals it references. A
+     # function already being keyed (recursion) only by its code.
+
+     code = function.__code__
+     qualified = "{}.{}".format(function.__module__,function.__qualname__)
+     if function in visiting:
+          return "{}:{}".format(qualified,hashlib.sha256(code.co_code + repr(code.co_names).encode()).hexdigest())
+     visiting.add(function)
+     try:
+          names    = [ name for name in code.co_names if name in function.__globals__ ]
+          bindings = (
+               [ _value_key(value,visiting) for value in function.__defaults__ or () ],
+               sorted( (name,_value_key(value,visiting)) for name,value in (function.__kwdefaults__ or {}).items() ),
+               [ _cell_key(cell,visiting) for cell in function.__closure__ or () ],
+               [ (name,_value_key(function.__globals__[name],visiting)) for name in names ],
+          )
+          return "{}:{}:{}".format(qualified,_code_key(code,visiting),repr(bindings))
+     finally:
+          visiting.discard(function)
+
+def _spec_key(spec):
+     if isinstance(spec,matchers):
+          spec = spec.spec
+     try:
+          return _value_key(spec,set())
+     except RecursionError as error:
+          raise _Uncacheable(str(error))
+
+def _hash_file(digest,path):
+     with open(path,"rb") as file:
+          for chunk in iter(lambda: file.read(1 << 16),b""):
+               digest.update(chunk)
+
+def _hash_tree(digest,root):
+     if os.path.isfile(root):
+          digest.update(root.encode() + b"\0")
+          _hash_file(digest,root)
+          return
+     for base,directories,files in os.walk(root):
+          directories[:] = sorted( d for d in directories if d != "__pycache__" and not d.startswith(".") )
+          for name in sorted(files):
+               if name.endswith((".pyc","~")): continue
+               path = os.path.join(base,name)
+               digest.update(path.encode() + b"\0")
+               _hash_file(digest,path)
+
+class ResultCache(object):
+
+     """An on-disk cache of passed examples below `directory`. An
+        example is skipped if it has passed before with the same
+        contents, the same expectations, the same interpreter and the
+        same `dependencies` (files or directories, by default the
+        `lib` directory if there is one, else the directory
+        `greenland` has been imported from). Entries older than
+        `max_age` seconds are not used, :py:meth:`evict` removes them
+        and the oldest entries beyond `max_size` bytes.
+
+        Predicates are keyed by their code, defaults, closure and the
+        globals they reference. Examples with a spec that has no
+        stable representation (e.g. an object whose repr is its
+        address) are not cached.
+     """
+
+     directory = os.path.join(".build","examples")  #: Default cache directory.
+     max_age   = 7 * 24 * 3600                     #: Entries older than this (seconds) are stale.
+     max_size  = 1 << 20                           #: Size (bytes) the cache is reduced to by :py:meth:`evict`.
+
+     def __init__(self,directory=None,dependencies=None,max_age=None,max_size=None):
+          if directory is not None: self.directory = directory
+          if max_age   is not None: self.max_age   = max_age
+          if max_size  is not None: self.max_size  = max_size
+          if dependencies is None:
+               dependencies = [ "lib" ] if os.path.isdir("lib") else [ os.path.dirname(os.path.dirname(os.path.abspath(__file__))) ]
+          self.dependencies = dependencies
+          self._environment = None
+          self.lock         = threading.Lock()
+
+     def environment(self):
+
+          """The hash of interpreter and dependencies, computed once."""
+
+          with self.lock:
+               if self._environment is None:
+                    digest = hashlib.sha256((sys.executable + "\0" + sys.version + "\0").encode())
+                    for dependency in self.dependencies:
+                         _hash_tree(digest,dependency)
+                    self._environment = digest.hexdigest()
+               return self._environment
+
+     def key(self,path,expectations):
+
+          """Return the key of the example at `path` checked against
+             the compiled `expectations`, `None` if it can not be
+             cached."""
+
+          digest = hashlib.sha256(self.environment().encode())
+          for what,expected in expectations:
+               try:
+                    digest.update("\0{}={}".format(what,_spec_key(expected)).encode())
+               except _Uncacheable:
+                    return None
+          _hash_file(digest,path)
+          return digest.hexdigest()
+
+     def entry(self,key):
+          return os.path.join(self.directory,key + ".json")
+
+     def passed(self,key):
+
+          """Return if the example with `key` has passed recently."""
+
+          try:
+               return time.time() - os.stat(self.entry(key)).st_mtime < self.max_age
+          except OSError:
+               return False
+
+     def store(self,key,path):
+
+          """Record that the example at `path` with `key` passed."""
+
+          os.makedirs(self.directory,exist_ok=True)
+          temporary = self.entry(key) + "~{}".format(threading.get_ident())
+          with open(temporary,"w") as entry:
+               json.dump({ 'path': path, 'time': time.time() },entry)
+          os.replace(temporary,self.entry(key))
+
+     def evict(self):
+
+          """Remove stale entries and, oldest first, entries beyond
+             :py:attr:`max_size`."""
+
+          try:
+               names = os.listdir(self.directory)
+          except OSError:
+               return
+          entries = []
+          for name in names:
+               path = os.path.join(self.directory,name)
+               try:
+                    status = os.stat(path)
+               except OSError:
+                    continue
+               entries.append((status.st_mtime,status.st_size,path))
+          entries.sort(reverse=True)
+          now, size = time.time(), 0
+          for mtime,length,path in entries:
+               size += length
+               if now - mtime >= self.max_age or size > self.max_size:
+                    try:
+                         os.remove(path)
+                    except OSError:
+                         pass
+
+def check_examples(examples,basepath="examples",workers=1,timeout=None,stop_on_error=None,stream=False,window=1 << 16,cache=None,
+                   fork=False,preload=default_preload):
+
+     """Check `examples`, a dictionary mapping the paths of example
+        scripts (relative to `basepath`) to expectations. The
+        expectations are dictionaries mapping attributes of the
+        :py:class:`subprocess.CompletedProcess` (`stdout`, `stderr`,
+        `returncode`) to specs: A string or bytes is a regular
+        expression to search for, a list is the set of allowed
+        values, a function is a predicate, anything else is compared
+        for equality. Additionally :py:data:`fail_on` can be given as
+        a regular expression which must not appear in the output. All
+        specs are compiled (see :py:func:`compile_expectations`)
+        before the first example is run.
+
+        With `stream` the output of the examples is matched while it
+        arrives, keeping only the last `window` bytes of each stream
+        and terminating examples as soon as the outcome is known (see
+        :py:func:`stream_example`). This is meant for long running
+        examples (servers) which log a lot.
+
+        With `workers` > 1 (or `None` for one worker per CPU) that
+        many examples are run concurrently. `timeout` limits the run
+        time of every single example (in seconds).
+
+        If `stop_on_error` is true, the first broken example (in the
+        order of `examples`) is raised as :py:class:`BrokenExample`,
+        otherwise all examples are run and the broken ones are
+        reported together as :py:class:`BrokenExamples`. The default
+        is to stop when running serially and to collect all failures
+        when running concurrently.
+
+        `cache` (a :py:class:`ResultCache`, `True` for the default
+        one, `None` or `False` for none) skips examples that have passed before and have not
+        changed since. Broken examples are always run again.
+
+        With `fork` Python examples are forked from the current
+        process (see :py:func:`fork_examples`) after the modules in
+        `preload` have been imported, which saves the start up time
+        of an interpreter per example. Other examples are still run
+        as subprocesses, as are all examples while other threads are
+        running. Fork mode does not apply when streaming, otherwise
+        the examples run in parallel without worker threads.
+     """
+
+     if cache is True:
+          cache = ResultCache()
+     elif not cache:
+          cache = None
+
+     if workers is None:
+          workers = os.cpu_count() or 1
+     if stop_on_error is None:
+          stop_on_error = (workers == 1)
+
+     jobs     = [ (os.path.join(basepath,example),compile_expectations(examples[example])) for example in examples ]
+     failures = []
+
+     keys = {}
+
+     def due(path,expectations):
+          if cache is None:
+               return True
+          keys[path] = cache.key(path,expectations)
+          return keys[path] is None or not cache.passed(keys[path])
+
+     def passed(path):
+          if cache is not None and keys[path] is not None:
+               cache.store(keys[path],path)
+
+     def check(path,expectations):
+          if due(path,expectations):
+               check_example(path,expectations,timeout,stream,window)
+               passed(path)
+
+     def check_forked(path,expectations,result):
+          if isinstance(result,BrokenExample):
+               raise result
+          verify(path,expectations,result)
+          passed(path)
+
+     def collect(check,*pargs):
+          try:
+               check(*pargs)
+          except BrokenExample as failure:
+               if stop_on_error: raise
+               failures.append(failure)
+
+     try:
+          if fork and not stream:
+               for module in preload:
+                    try:
+                         importlib.import_module(module)
+                    except ImportError:
+                         pass
+               pending = dict( (path,expectations) for path,expectations in jobs if due(path,expectations) )
+               for path,result in fork_examples(list(pending),workers,timeout):
+                    collect(check_forked,path,pending[path],result)
+          elif workers == 1:
+               for path,expectations in jobs:
+                    collect(check,path,expectations)
+          else:
+               with ThreadPoolExecutor(max_workers=workers) as pool:
+                    futures = [ pool.submit(check,path,expectations) for path,expectations in jobs ]
+                    try:
+                         for future in futures:
+                              collect(future.result)
+                    finally:
+                         for future in futures:
+                              future.cancel()
+     finally:
+          if cache is not None:
+               cache.evict()
+
+     if failures:
+          raise BrokenExamples(failures)
@@ -44,75 +44,194 @@ provided by a framework implementation as, in example,
 
 """
 
+import time
 import greenland.introspection.caller as caller
 import greenland.introspection.safe   as safe
+import greenland.testing.measurements as measurements
+import greenland.templates.summary    as summary
+import greenland.testing.diff         as diff
 from   greenland.introspection.safe   import Excn, Value
-from   greenland.errors               import Error, next_stackframe
+from   greenland.errors               import Error, next_stackframe, deferred
 
 at_statement = " at statement: {source}"
 
 class TestFailure(Error):
 
-    """XXX TBD"""
+    """XXX TBD
+
+    The values `expected` and `actual` are stored as they are, their
+    (bounded) representations are only computed when a failure is
+    rendered, by :py:attr:`summarizer`.
+    """
 
+    summarizer      = summary.summarizer  #: Renders :py:attr:`expected_repr` and :py:attr:`actual_repr`.
+    show_difference = True                #: If to describe the first differing region in the info.
     
     def __init__(self,expected,actual,__stackframe__=0,location=None,**kwargs):
 
         """XXX TBD"""
         
-        mro = ", ".join(( cls.__module__+"."+cls.__name__ for cls in type(actual).__mro__ ))
         super(TestFailure,self).__init__(
-            expected = expected, actual = actual,mro=mro,__stackframe__= next_stackframe(__stackframe__),location=location,**kwargs
+            expected = expected, actual = actual,__stackframe__= next_stackframe(__stackframe__),location=location,**kwargs
         )
 
+    @deferred
+    def mro(self):
+
+        """The MRO of the class of `actual`, as string."""
+
+        return ", ".join(( cls.__module__+"."+cls.__name__ for cls in type(self.actual).__mro__ ))
+
+    @deferred
+    def expected_repr(self):
+
+        """The bounded representation of `expected`."""
+
+        return self.summarizer.repr(self.expected)
+
+    @deferred
+    def actual_repr(self):
+
+        """The bounded representation of `actual`."""
+
+        return self.summarizer.repr(self.actual)
+
+    @deferred
+    def difference(self):
+
+        """The first differing region of `expected` and `actual` (see
+        :py:func:`greenland.templates.summary.first_difference`), if
+        :py:attr:`show_difference` is set and they are sequences."""
+
+        if not self.show_difference:
+            return "-"
+        return summary.first_difference(self.expected,self.actual,summarizer=self.summarizer) or "-"
+
     info = """
            at: {source}
 
-           actual            : {actual!r}
+           actual            : {actual_repr}
            actual.__class__  : {actual.__class__!r}
-           expected:         : {expected!r}
+           expected:         : {expected_repr}
+           difference        : {difference}
            """
 
+    fields = ('expected','actual')
+
     
 class UnexpectedResult(TestFailure):
 
-    """XXX TBD"""
+    """XXX TBD
+
+    If expected and actual value are containers, the info lists their
+    structural differences (see :py:mod:`greenland.testing.diff`), at
+    most :py:attr:`diff_limit` of them.
+    """
     
-    message = "Unexpected result: expected = {expected!r}, actual = {actual!r}" + at_statement
+    message = "Unexpected result: expected = {expected_repr}, actual = {actual_repr}" + at_statement
+
+    diff_limit = diff.default_limit  #: Number of differences after which the structural diff stops.
+
+    info = """
+           at: {source}
+
+           actual            : {actual_repr}
+           actual.__class__  : {actual.__class__!r}
+           expected:         : {expected_repr}
+           difference        : {difference}
+           structure         : {structure}
+           """
+
+    @deferred
+    def structure(self):
+
+        """The structural differences between `expected` and `actual`,
+        if both are containers."""
+
+        if not (isinstance(self.expected,diff.containers) and isinstance(self.actual,diff.containers)):
+            return "-"
+        return diff.diff(self.expected,self.actual,self.diff_limit).render("\n    ",self.summarizer) or "-"
 
 class MissingException(TestFailure):
 
     """XXX TBD"""
     
-    message = "Missing exception (got value return instead): expected = {expected!r}, actual = {actual!r}" + at_statement
+    message = "Missing exception (got value return instead): expected = {expected_repr}, actual = {actual_repr}" + at_statement
 
 class UnexpectedException(TestFailure):
 
     """XXX TBD"""
     
-    message = "Unexpected exception (instead of value return): expected = {expected!r}, actual = {actual!r}" + at_statement
+    message = "Unexpected exception (instead of value return): expected = {expected_repr}, actual = {actual_repr}" + at_statement
 
 class WrongException(TestFailure):
 
     """XXX TBD"""
     
-    message = "Wrong exception: expected = {expected!r}, actual = {actual!r}" + at_statement    
+    message = "Wrong exception: expected = {expected_repr}, actual = {actual_repr}" + at_statement    
 
 class ExceptionConstraintViolation(TestFailure):
 
     """XXX TBD"""
     
-    message = "Exception constraint violated: actual = {actual!r}, constraint = {constraint!r}" + at_statement
+    message = "Exception constraint violated: actual = {actual_repr}, constraint = {constraint!r}" + at_statement
+
+    fields  = ('constraint',)
     
+class TooSlow(TestFailure):
+
+    """Reported when the run time of an expectee exceeds its budget
+    (see :py:meth:`Expectee.runs_within` and
+    :py:meth:`Expectee.runs_no_slower_than`). `actual` is the measured
+    and `expected` the allowed time in seconds."""
+
+    message = "Too slow: {statistic} run time {actual:.6f}s exceeds the budget of {expected:.6f}s" + at_statement
+
+    info    = """
+              at: {source}
+
+              measured : {actual:.6f}s ({statistic})
+              allowed  : {expected:.6f}s
+              timing   : {timing!r}
+              baseline : {baseline!r}
+              """
+
+    fields  = ('statistic','timing','baseline')
+
+class ExcessiveAllocation(TestFailure):
+
+    """Reported when an expectee allocates more memory than its
+    budget (see :py:meth:`Expectee.allocates_at_most`). `actual` is
+    the measured and `expected` the allowed amount (bytes or blocks,
+    depending on `measure`)."""
+
+    message = "Excessive allocation: {measure} {actual} exceeds the budget of {expected}" + at_statement
+
+    info    = """
+              at: {source}
+
+              measured   : {actual} ({measure})
+              allowed    : {expected}
+              allocations: {allocations!r}
+              top sites  : {sites}
+              """
+
+    fields  = ('measure','allocations','sites')
+
 class ErrorsOccurred(Error):
 
     """XXX TBD"""
     
     message = "Error occcured during test: {recorder}, stop_on_error = {stop_on_error}"
+
+    fields  = ('recorder','stop_on_error')
     
 #  Recorders (also: Stop-Policy)      
 
 import sys
+import heapq
+import itertools
+import threading
 
 class Recorder (object):
 
@@ -122,25 +241,80 @@ class Recorder (object):
     errors        = 0           #: Conter for errors (test deviations).
     stop_on_error = True        #: If to stop on first error.
     logfile       = sys.stderr  #: File where to log test events.
+
+    expectations  = 0           #: Counter for checked expectations (see :py:meth:`tick`).
+    passes        = 0           #: Counter for expectations that have been met.
+    wall          = 0.0         #: Total wall clock time spent in expectees (seconds).
+    cpu           = 0.0         #: Total CPU time spent in expectees (seconds).
+    keep_slowest  = 10          #: How many of the slowest expectations to remember.
+    sinks         = ()          #: Sinks receiving test events (see :py:mod:`greenland.testing.sinks`).
     
-    def __init__( self, stop_on_error = True, logfile = sys.stderr ):
+    def __init__( self, stop_on_error = True, logfile = sys.stderr, sinks = () ):
 
         """XXX TBD"""
         
         self.errors = 0
         self.stop_on_error = stop_on_error
         self.logfile = logfile
+        self.lock = threading.Lock()
+        self.expectations = 0
+        self.passes  = 0
+        self.wall    = 0.0
+        self.cpu     = 0.0
+        self.slowest = []           # heap of (wall, sequence number, cpu, location)
+        self.sequence = itertools.count()
+        self.started = time.perf_counter()
+        self.sinks   = tuple(sinks)
+        self.pending = threading.local()    # (location, wall) of the failing expectation, see tick()
+
+    def __repr__(self):
+        return "{}(errors={}, stop_on_error={})".format(self.__class__.__name__,self.errors,self.stop_on_error)
         
     def report(self,e,__stackframe__=0):
 
-        """XXX TBD"""
+        """XXX TBD
+
+        Counting and logging are done under :py:attr:`lock`, so a
+        recorder can be shared between threads. The :py:attr:`sinks`
+        are flushed before a failure is raised with `stop_on_error`.
+        """
         
+        if self.sinks:
+            location, wall = getattr(self.pending,'failing',(None,None))
+            self.pending.failing = (None,None)
+            for sink in self.sinks:
+                sink.failed(getattr(e,'location',None) or location,e,wall)
+
         if self.stop_on_error:            
+            for sink in self.sinks:
+                sink.flush()
             raise e
         else:
-            self.errors += 1
-            print(e,file=self.logfile)
-            print(file=self.logfile)
+            text = str(e)
+            with self.lock:
+                self.errors += 1
+                print(text,file=self.logfile)
+                print(file=self.logfile)
+
+    def merge(self,*recorders):
+
+        """Add the counts of other `recorders` (e.g. the recorders of
+        worker threads or tasks) to this recorder. Returns `self`.
+        """
+
+        for recorder in recorders:
+            with recorder.lock:
+                errors, expectations, passes = recorder.errors, recorder.expectations, recorder.passes
+                wall, cpu, slowest           = recorder.wall, recorder.cpu, list(recorder.slowest)
+            with self.lock:
+                self.errors       += errors
+                self.expectations += expectations
+                self.passes       += passes
+                self.wall         += wall
+                self.cpu          += cpu
+                for entry in slowest:
+                    self._keep(entry[0],entry[2],entry[3])
+        return self
                        
     def unexpected_return_value(self,expected,actual,__stackframe__=-1,location=None):
 
@@ -174,20 +348,160 @@ class Recorder (object):
         self.report( ExceptionConstraintViolation(expected,actual,constraint=constraint,__stackframe__=next_stackframe(__stackframe__),location=location))        
 
 
-    def tick(self):   # XXX also __stackframe__
+    def too_slow(self,expected,actual,statistic,timing,baseline=None,__stackframe__=-1,location=None):
+
+        """Report a :py:class:`TooSlow` failure: the `statistic` (e.g.
+        `"median"` or a percentile, see
+        :py:meth:`~greenland.testing.measurements.Timing.statistic`)
+        of the run times in `timing` (a
+        :py:class:`~greenland.testing.measurements.Timing`) is `actual`
+        seconds, more than the `expected` budget. `baseline` is the
+        :py:class:`~greenland.testing.measurements.Timing` of the
+        reference thunk the budget has been derived from, if any.
+        """
+
+        self.report( TooSlow(expected,actual,statistic=statistic,timing=timing,baseline=baseline,__stackframe__=next_stackframe(__stackframe__),location=location))
+
+    def excessive_allocation(self,expected,actual,measure,allocations,__stackframe__=-1,location=None):
+
+        """Report an :py:class:`ExcessiveAllocation` failure: the
+        `measure` (`"peak"`, `"net"` or `"count"`) of `allocations` (a
+        :py:class:`~greenland.testing.measurements.Allocations`) is
+        `actual`, more than the `expected` budget. The failure lists
+        the allocation sites explaining that measure (see
+        :py:meth:`~greenland.testing.measurements.Allocations.sites_for`).
+        """
+
+        sites = "\n      ".join(allocations.sites_for(measure)) or "(none)"
+        self.report( ExcessiveAllocation(expected,actual,measure=measure,allocations=allocations,sites=sites,__stackframe__=next_stackframe(__stackframe__),location=location))
+
+    def start(self,location=None):
+
+        """Record that the expectation at `location` is about to be
+        checked (only passed on to the :py:attr:`sinks`)."""
+
+        for sink in self.sinks:
+            sink.started(location)
+
+    def tick(self,location=None,wall=None,cpu=None,passed=True,count=1,failures=None):   # XXX also __stackframe__
+
+        """Record that `count` expectations at `location` have been
+        checked (before their failures are reported), whether they
+        `passed` and the wall clock and CPU time (in seconds, `None`
+        if not measured) it took to run the expectee. If some of them
+        passed, `failures` is the number of those that did not.
+        """
+
+        if failures is None:
+            failures = 0 if passed else count
+        with self.lock:
+            self.expectations += count
+            self.passes       += count - failures
+            if wall is not None:
+                self.wall += wall
+                self._keep(wall,cpu,location)
+            if cpu is not None:
+                self.cpu += cpu
+        if self.sinks:
+            if passed:
+                for sink in self.sinks:
+                    sink.passed(location,wall)
+            else:
+                self.pending.failing = (location,wall)
+
+    def _keep(self,wall,cpu,location):
+        entry = (wall,next(self.sequence),cpu,location)
+        if len(self.slowest) < self.keep_slowest:
+            heapq.heappush(self.slowest,entry)
+        elif wall > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest,entry)
+
+    def dump(self):
+
+        """Return the statistics as a dictionary of plain values (to be
+        serialized as JSON, for example): counts, total times,
+        expectations per second since the recorder has been created
+        and the slowest expectations with their locations.
+        """
+
+        with self.lock:
+            elapsed = time.perf_counter() - self.started
+            return {
+                'expectations'      : self.expectations,
+                'passes'            : self.passes,
+                'failures'          : self.expectations - self.passes,
+                'errors'            : self.errors,
+                'wall'              : self.wall,
+                'cpu'               : self.cpu,
+                'elapsed'           : elapsed,
+                'expectations_per_s': self.expectations / elapsed if elapsed > 0 else None,
+                'slowest'           : [
+                    { 'file': location.file if location else None,
+                      'line': location.line if location else None,
+                      'wall': wall, 'cpu': cpu }
+                    for wall,_,cpu,location in sorted(self.slowest,reverse=True)
+                ]
+            }
+
+    def summary(self):
+
+        """Return a human readable summary of :py:meth:`dump`."""
+
+        stats = self.dump()
+        lines = [ "{expectations} expectations, {passes} passed, {failures} failed in {elapsed:.3f}s"
+                  " ({wall:.3f}s wall, {cpu:.3f}s CPU in expectees)".format(**stats) ]
+        if stats['expectations_per_s'] is not None:
+            lines.append("{:.1f} expectations/s".format(stats['expectations_per_s']))
+        if stats['slowest']:
+            lines.append("slowest:")
+            for entry in stats['slowest']:
+                cpu = "-" if entry['cpu'] is None else "{:.6f}s".format(entry['cpu'])
+                lines.append("  {}:{}: {:.6f}s wall, {} CPU".format(entry['file'],entry['line'],entry['wall'],cpu))
+        return "\n".join(lines)
+        
+    def close(self):
 
-        """XXX TBD"""
+        """Close the :py:attr:`sinks`."""
+
+        for sink in self.sinks:
+            sink.close()
 
-        return
-        
     def done(self):   # XXX also __stackframe__
 
-        """XXX TBD"""
+        """XXX TBD
+
+        Closes the recorder (see :py:meth:`close`) first.
+        """
         
+        self.close()
         if self.errors>0:
             raise ErrorsOccurred(recorder=self,stop_on_error=self.stop_on_error,__stackframe__=-1)
         
 
+def mismatching_rows(expected,actual):
+
+    """Return the indices of the rows where the sequences `expected`
+    and `actual` differ, or `None` if they can not be compared row by
+    row (different lengths or shapes). NumPy arrays are compared
+    vectorized; NumPy is never imported here, an array can only be
+    passed if it has been imported already.
+    """
+
+    numpy = sys.modules.get('numpy')
+    if numpy is not None and (isinstance(expected,numpy.ndarray) or isinstance(actual,numpy.ndarray)):
+        expected, actual = numpy.asarray(expected), numpy.asarray(actual)
+        if expected.shape != actual.shape:
+            return None
+        differ = numpy.asarray(expected != actual)
+        if differ.ndim > 1:
+            differ = differ.reshape(len(differ),-1).any(axis=1)
+        return numpy.flatnonzero(differ).tolist()
+
+    if len(expected) != len(actual):
+        return None
+    return [ row for row,(e,a) in enumerate(zip(expected,actual)) if e != a ]
+
+
 class Expectee (object):
 
     """XXX TBD"""
@@ -205,40 +519,143 @@ class Expectee (object):
 
         """XXX TBD"""
         
-        result = safe.apply(thunk)
+        self.recorder.start(location or self.location)
+        result, wall, cpu = safe.apply_timed(thunk)
+        self.check_returned(result,expected,next_stackframe(__stackframe__),location,wall,cpu)
+
+    def check_returned(self,result,expected,__stackframe__=-2,location=None,wall=None,cpu=None):
+
+        """Check a :py:class:`~greenland.introspection.safe.Result`
+        obtained earlier against the `expected` return value. The
+        outcome and the time it took to obtain the result (`wall`,
+        `cpu`) are passed to :py:meth:`Recorder.tick` first."""
+
         if result.Type == Excn:
+            self.recorder.tick(location or self.location,wall,cpu,passed=False)
             self.recorder.unexpected_exception(expected,result.value,__stackframe__,location)
         else:
             actual = result.value
-            if actual != expected:
+            passed = not (actual != expected)
+            self.recorder.tick(location or self.location,wall,cpu,passed)
+            if not passed:
                 self.recorder.unexpected_return_value(expected,actual,__stackframe__,location)
                 
     def returns(self,expected,__stackframe__=0):
 
         """XXX TBD"""
         
-        self.check_returns(self.expectee,expected)
+        self.check_returns(self.expectee,expected,location=self.location)
         
-    def returning(self,table,stackframe_depth=0):
+    def returning(self,table,stackframe_depth=0,executor=None):
 
-        """XXX TBD"""
+        """XXX TBD
+
+        If an `executor` (a :py:class:`concurrent.futures.Executor`)
+        is given, the rows are computed there (see :py:meth:`run_table`).
+        """
         
+        if executor is not None:
+            for value,(result,wall,cpu) in self.run_table(table,executor):
+                self.check_returned(result,table[value],location=self.location,wall=wall,cpu=cpu)
+            return self
+
         for value in table:
             self.check_returns(lambda: self.expectee(value),table[value],location=self.location)
         return self
 
-    def check_raises(self,thunk,Expected, satisfying = lambda ex : True ,__stackframe__=-2,location=None):
+    def run_table(self,table,executor):
+
+        """Apply the expectee to all inputs in `table` concurrently in
+        `executor` (a thread or process pool, for the latter the
+        expectee must be picklable) and yield the pairs (`input`,
+        (`result`, `wall`, `cpu`)) as returned by
+        :py:func:`~greenland.introspection.safe.apply_timed` in table
+        order. Rows not yet started are cancelled when the consumer
+        stops early (e.g. on the first failure).
+        """
+
+        for value in table:
+            self.recorder.start(self.location)
+        futures = [ (value,executor.submit(safe.apply_timed,self.expectee,value)) for value in table ]
         try:
-            actual = thunk()
-        except Exception as ex:
-            if isinstance(ex,Expected):
-                if not satisfying(ex):
-                    self.recorder.exception_constraint_violation(Expected,ex,satisfying,__stackframe__,location) # XXX this branch is broken.
-                else:
-                    return
+            for value,future in futures:
+                yield value,future.result()
+        finally:
+            for _,future in futures:
+                future.cancel()
+
+    def returning_batch(self,table,vectorized=True):
+
+        """Check a table of return values in one go. `table` is either
+        a dictionary mapping inputs to expected outputs (as for
+        :py:meth:`returning`) or a pair of sequences (`inputs`,
+        `outputs`).
+
+        If `vectorized` is true, the expectee is called once with the
+        sequence of all inputs and must return the sequence of all
+        outputs, otherwise it is called once per input. The results
+        are compared in bulk (element wise with NumPy, if either side
+        is a NumPy array) and failures are only constructed for the
+        rows that do not match.
+        """
+
+        if isinstance(table,dict):
+            inputs, expected = list(table.keys()), list(table.values())
+        else:
+            inputs, expected = table
+
+        self.recorder.start(self.location)
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            if vectorized:
+                actual = self.expectee(inputs)
             else:
+                actual = [ self.expectee(value) for value in inputs ]
+        except Exception as ex:
+            if vectorized:
+                self.recorder.tick(self.location,time.perf_counter() - wall,time.thread_time() - cpu,passed=False,count=len(expected))
+                self.recorder.unexpected_exception(expected,ex,location=self.location)
+                return self
+            for value,output in zip(inputs,expected):            # find the rows that raise
+                self.check_returns(lambda: self.expectee(value),output,location=self.location)
+            return self
+
+        wall, cpu = time.perf_counter() - wall, time.thread_time() - cpu
+
+        rows = mismatching_rows(expected,actual)
+        self.recorder.tick(self.location,wall,cpu,passed = (rows == []),count=len(expected),
+                           failures = len(expected) if rows is None else len(rows))
+        if rows is None:
+            self.recorder.unexpected_return_value(expected,actual,location=self.location)
+        else:
+            for row in rows:
+                self.recorder.unexpected_return_value(expected[row],actual[row],location=self.location)
+        return self
+
+    def check_raises(self,thunk,Expected, satisfying = lambda ex : True ,__stackframe__=-2,location=None):
+        self.recorder.start(location or self.location)
+        result, wall, cpu = safe.apply_timed(thunk)
+        self.check_raised(result,Expected,satisfying,next_stackframe(__stackframe__),location,wall,cpu)
+
+    def check_raised(self,result,Expected, satisfying = lambda ex : True ,__stackframe__=-2,location=None,wall=None,cpu=None):
+
+        """Check a :py:class:`~greenland.introspection.safe.Result`
+        obtained earlier against the `Expected` exception (see
+        :py:meth:`check_returned`)."""
+
+        if result.Type == Excn:
+            ex = result.value
+            if not isinstance(ex,Expected):
+                self.recorder.tick(location or self.location,wall,cpu,passed=False)
                 self.recorder.wrong_exception(Expected,ex,__stackframe__,location)
-        self.recorder.missing_exception(Expected,actual,__stackframe__,location)
+            elif not satisfying(ex):
+                self.recorder.tick(location or self.location,wall,cpu,passed=False)
+                self.recorder.exception_constraint_violation(Expected,ex,satisfying,__stackframe__,location)
+            else:
+                self.recorder.tick(location or self.location,wall,cpu,passed=True)
+        else:
+            self.recorder.tick(location or self.location,wall,cpu,passed=False)
+            self.recorder.missing_exception(Expected,result.value,__stackframe__,location)
         
     def raises(self,Expected, satisfying = lambda ex : True ,__stackframe__=0):
 
@@ -246,13 +663,214 @@ class Expectee (object):
         
         self.check_raises(self.expectee,Expected,satisfying = satisfying, location=self.location)
         
-    def raising(self,table,stackframe_depth=0):
+    def raising(self,table,stackframe_depth=0,executor=None):
 
-        """XXX TBD"""
+        """XXX TBD
+
+        If an `executor` is given, the rows are computed there (see
+        :py:meth:`run_table`).
+        """
         
+        if executor is not None:
+            for value,(result,wall,cpu) in self.run_table(table,executor):
+                self.check_raised(result,table[value],location=self.location,wall=wall,cpu=cpu)
+            return self
+
         for value in table:
             self.check_raises(lambda: self.expectee(value),table[value],location=self.location)
         return self    
 
+    def runs_within(self,budget,repeat=None,warmup=None,statistic="median"):
+
+        """Expect the expectee (a thunk) to run within `budget`
+        seconds. The expectee is run `warmup` times, then its run time
+        is measured over `repeat` runs (see
+        :py:func:`~greenland.testing.measurements.time_runs`) and the
+        `statistic` (`"median"`, `"mean"`, `"min"`, `"max"` or a
+        percentile) of these is compared to the budget. A violation
+        is reported as :py:class:`TooSlow`.
+        """
+
+        self.check_timing(budget,None,repeat,warmup,statistic)
+
+    def runs_no_slower_than(self,baseline,factor=1.0,repeat=None,warmup=None,statistic="median"):
+
+        """Expect the expectee to run no slower than `factor` times the
+        thunk `baseline`, both measured as in :py:meth:`runs_within`.
+        """
+
+        self.recorder.start(self.location)
+        try:
+            reference = measurements.time_runs(baseline,repeat,warmup)
+        except Exception as ex:
+            self.recorder.tick(self.location,passed=False)
+            self.recorder.unexpected_exception(baseline,ex,location=self.location)
+            return
+        self.check_timing(factor * reference.statistic(statistic),reference,repeat,warmup,statistic)
+
+    def check_timing(self,budget,baseline,repeat,warmup,statistic):
+
+        """Time `repeat` runs of the expectee after `warmup` runs (see
+        :py:func:`~greenland.testing.measurements.time_runs`) and
+        expect their `statistic` to be at most `budget` seconds, else
+        report :py:class:`TooSlow`. `baseline` is the
+        :py:class:`~greenland.testing.measurements.Timing` the budget
+        has been derived from (`None` for a fixed budget); if it is
+        given the recorder has already been told that the expectation
+        started.
+        """
+
+        if baseline is None:
+            self.recorder.start(self.location)
+        try:
+            timing = measurements.time_runs(self.expectee,repeat,warmup)
+        except Exception as ex:
+            self.recorder.tick(self.location,passed=False)
+            self.recorder.unexpected_exception(budget,ex,location=self.location)
+            return
+
+        measured = timing.statistic(statistic)
+        passed   = measured <= budget
+        self.recorder.tick(self.location,sum(timing.runs),None,passed)
+        if not passed:
+            self.recorder.too_slow(budget,measured,statistic,timing,baseline,location=self.location)
+
+    def allocates_at_most(self,budget,measure="peak",warmup=None,top=5):
+
+        """Expect the expectee (a thunk) to allocate at most `budget`
+        bytes (or blocks, for `measure` `"count"`). The expectee is
+        run `warmup` times, then once more under
+        :py:mod:`tracemalloc` (see
+        :py:func:`~greenland.testing.measurements.trace_allocations`)
+        and the `measure` (`"peak"`, `"net"` or `"count"`) is compared
+        to the budget. A violation is reported as
+        :py:class:`ExcessiveAllocation` listing the `top` allocation
+        sites (for `"peak"` those at the peak, found in one more run,
+        see :py:func:`~greenland.testing.measurements.peak_sites`).
+        """
+
+        self.recorder.start(self.location)
+        started = time.perf_counter()
+        try:
+            allocations = measurements.trace_allocations(self.expectee,warmup,top)
+        except Exception as ex:
+            self.recorder.tick(self.location,passed=False)
+            self.recorder.unexpected_exception(budget,ex,location=self.location)
+            return
+
+        measured = allocations.measure(measure)
+        passed   = measured <= budget
+        self.recorder.tick(self.location,time.perf_counter()-started,None,passed)
+        if not passed:
+            if measure == "peak":
+                allocations.peak_sites = measurements.peak_sites(self.expectee,top)
+            self.recorder.excessive_allocation(budget,measured,measure,allocations,location=self.location)
+
+
+class AsyncExpectee (Expectee):
+
+    """An :py:class:`Expectee` for coroutine functions (or functions
+    returning awaitables). The vocabulary methods are coroutines that
+    await the expectee and report to the recorder like their
+    synchronous counterparts:
+
+    .. code-block:: python
+
+       await expect_async( lambda: fetch(5) ) .returns (10)
+       await ( expect_async( fetch ) |returning| { 5: 10, 6: 12 } )
+
+    Table rows run concurrently (see :py:meth:`run_table_async`), at
+    most `concurrency` at a time if that is given.
+    """
+
+    def __init__(self,expectee,recorder,concurrency=None,__stackframe__=0):
+
+        """Wrap the coroutine function `expectee`, reporting to
+        `recorder`. `concurrency` limits the number of table rows run
+        at the same time (`None`: no limit). The location of the
+        expectation is captured as for :py:class:`Expectee`.
+        """
+
+        super(AsyncExpectee,self).__init__(expectee,recorder,next_stackframe(__stackframe__))
+        self.concurrency = concurrency
+
+    async def returns(self,expected,__stackframe__=0):
+
+        """Await the expectee (called without arguments) and expect it
+        to return `expected` (compared with ``!=``).
+        """
+
+        result, wall = await self.apply_async()
+        self.check_returned(result,expected,location=self.location,wall=wall)
+
+    async def raises(self,Expected, satisfying = lambda ex : True ,__stackframe__=0):
+
+        """Await the expectee (called without arguments) and expect it
+        to raise an instance of `Expected` for which `satisfying`
+        holds.
+        """
+
+        result, wall = await self.apply_async()
+        self.check_raised(result,Expected,satisfying,location=self.location,wall=wall)
+
+    async def returning(self,table,stackframe_depth=0):
+
+        """Expect the expectee to return ``table[value]`` when awaited
+        with each `value` in the dictionary `table`. The rows run
+        concurrently (see :py:meth:`run_table_async`) and are checked
+        in table order. Returns `self`.
+        """
+
+        for value,(result,wall) in zip(table,await self.run_table_async(table)):
+            self.check_returned(result,table[value],location=self.location,wall=wall)
+        return self
+
+    async def raising(self,table,stackframe_depth=0):
+
+        """Expect the expectee to raise an instance of ``table[value]``
+        when awaited with each `value` in the dictionary `table`. The
+        rows run concurrently (see :py:meth:`run_table_async`) and are
+        checked in table order. Returns `self`.
+        """
+
+        for value,(result,wall) in zip(table,await self.run_table_async(table)):
+            self.check_raised(result,table[value],location=self.location,wall=wall)
+        return self
+
+    async def apply_async(self,*pargs):
+
+        """Apply the expectee with
+        :py:func:`~greenland.introspection.safe.apply_async` and
+        return the pair (`result`, `wall`). The wall clock time
+        includes the time spent waiting for other tasks, the CPU time
+        can not be attributed to the expectee and is not measured.
+        """
+
+        self.recorder.start(self.location)
+        wall   = time.perf_counter()
+        result = await safe.apply_async(self.expectee,*pargs)
+        return result, time.perf_counter() - wall
+
+    async def run_table_async(self,table):
+
+        """Apply the expectee to all inputs in `table` concurrently with
+        :py:func:`asyncio.gather` (limited to :py:attr:`concurrency`
+        rows at a time, if given) and return the list of pairs
+        (`result`, `wall`) in table order (see :py:meth:`apply_async`).
+        """
+
+        import asyncio             # only imported when coroutines are tested, it is expensive
+
+        if not self.concurrency:
+            return await asyncio.gather(*( self.apply_async(value) for value in table ))
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def row(value):
+            async with semaphore:
+                return await self.apply_async(value)
+
+        return await asyncio.gather(*( row(value) for value in table ))
+
 
 # TODO: source lines: replace multiple white spaces by one simple space
@@ -66,22 +66,81 @@ available vocabulary to phrase expectations and the documentation of
 :py:class:`~greenland.testing.expectations.Recorder` objects.
 """
 
+import contextlib
+import contextvars
 import greenland.testing.expectations as expectations
 
 from   greenland.testing.expectations import                               \
     UnexpectedResult, MissingException,                                    \
-    UnexpectedException, WrongException, ExceptionConstraintViolation
+    UnexpectedException, WrongException, ExceptionConstraintViolation,     \
+    TooSlow, ExcessiveAllocation
 
-from greenland.testing.infix_syntax import returns, returning, raises, raising
+from greenland.testing.infix_syntax import returns, returning, returning_all, raises, raising, \
+    runs_within, runs_no_slower_than, allocates_at_most
 
-def expect( expectee, recorder=expectations.Recorder()):
+_recorder = contextvars.ContextVar('greenland.testing.framework.recorder')
+
+def current_recorder():
+
+    """Return the default recorder of the current context (see
+       :py:mod:`contextvars`): Every thread gets its own default
+       recorder, asyncio tasks share the recorder of the context they
+       have been created in. The recorder is created on first use and
+       will (a) print on stderr and (b) stop on the first test
+       deviation.
+    """
+
+    try:
+        return _recorder.get()
+    except LookupError:
+        recorder = expectations.Recorder()
+        _recorder.set(recorder)
+        return recorder
+
+@contextlib.contextmanager
+def recording( recorder=None ):
+
+    """Make `recorder` (a new
+       :py:class:`~greenland.testing.expectations.Recorder` if `None`)
+       the default recorder of the current context in a `with`
+       block and yield it. Use this in worker threads or tasks to
+       keep their counts and logs apart, and
+       :py:meth:`~greenland.testing.expectations.Recorder.merge` to
+       collect them afterwards.
+    """
+
+    if recorder is None:
+        recorder = expectations.Recorder()
+    token = _recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _recorder.reset(token)
+
+def expect( expectee, recorder=None):
 
     """Construct an :py:class:`~greenland.testing.expectations.Expectee`
        with the given
        :py:class:`~greenland.testing.expectations.Recorder`. The
-       default recorder will (a) print on stdout and (b) stop on the
-       first test deviation.
+       default is the recorder of the current context (see
+       :py:func:`current_recorder`).
 
     """
     
+    if recorder is None:
+        recorder = current_recorder()
     return expectations.Expectee ( expectee ,recorder )
+
+
+def expect_async( expectee, recorder=None, concurrency=None ):
+
+    """Construct an :py:class:`~greenland.testing.expectations.AsyncExpectee`
+       for a coroutine function, the expectations on which are
+       awaited. Table rows run concurrently, at most `concurrency` at
+       a time if given. Note that the infix forms need parentheses
+       when awaited: `await ( expect_async(f) |returns| (10) )`.
+    """
+
+    if recorder is None:
+        recorder = current_recorder()
+    return expectations.AsyncExpectee ( expectee, recorder, concurrency )
@@ -18,7 +18,59 @@
 #   02110-1301 USA.
 
 
-from infix import or_infix as infix
+"""\
+
+The vocabulary of infix words for expectations::
+
+    expect( lambda: double(5) ) |returns| (10)
+
+`left |word| right` is evaluated as `(left | word) | right`: the word
+binds the left operand into a partial (a small object with
+`__slots__`), which calls the word's function when or'ed with the
+right operand. Where the overhead of this matters, e.g. in generated
+loops of expectations, call the methods of
+:py:class:`~greenland.testing.expectations.Expectee` directly
+(`expect(...).returns(10)`) or the word as function
+(`returns(expect(...),10)`).
+
+"""
+
+class infix(object):
+
+    """Turn `function(left, right)` into an infix word used as
+    `left |word| right`. The word can also be called as a function."""
+
+    __slots__ = ('function',)
+
+    def __init__(self,function):
+        self.function = function
+
+    def __ror__(self,left):
+        return Partial(self.function,left)
+
+    def __call__(self,left,right):
+        return self.function(left,right)
+
+    @property
+    def __name__(self):
+        return self.function.__name__
+
+    def __repr__(self):
+        return "infix({})".format(self.function.__name__)
+
+class Partial(object):
+
+    """An infix word bound to its left operand."""
+
+    __slots__ = ('function','left')
+
+    def __init__(self,function,left):
+        self.function = function
+        self.left     = left
+
+    def __or__(self,right):
+        return self.function(self.left,right)
+
 
 @infix
 def returns(expectee,expected):
@@ -33,8 +85,22 @@ def returning(expectee,table):
     return expectee.returning(table)    
     
 
+@infix
+def returning_all(expectee,table):
+    return expectee.returning_batch(table)
+
 @infix
 def raising(expectee,table):
     return expectee.raising(table)
 
-    
+@infix
+def runs_within(expectee,budget):
+    return expectee.runs_within(budget)
+
+@infix
+def runs_no_slower_than(expectee,baseline):
+    return expectee.runs_no_slower_than(baseline)
+
+@infix
+def allocates_at_most(expectee,budget):
+    return expectee.allocates_at_most(budget)
@@ -0,0 +1,242 @@
+#
+#   Greenland -- a Python based scripting environment.
+#   Copyright (C) 2015-2017  M E Leypold.
+#
+#   This program is free software; you can redistribute it and/or
+#   modify it under the terms of the GNU General Public License as
+#   published by the Free Software Foundation; either version 2 of the
+#   License, or (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program; if not, write to the Free Software
+#   Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA
+#   02110-1301 USA.
+
+"""\
+
+Measurements of expectees, e.g. run times, as used by performance
+expectations like :py:meth:`~greenland.testing.expectations.Expectee.runs_within`.
+
+"""
+
+import sys
+import time
+
+default_repeat = 5   #: How often an expectee is run to measure its run time.
+default_warmup = 1   #: How often an expectee is run before measuring.
+
+class Timing(object):
+
+    """The run times (in seconds) measured over repeated runs of a
+    thunk, with some statistics on them.
+    """
+
+    __slots__ = ('runs',)
+
+    def __init__(self,runs):
+        self.runs = sorted(runs)
+
+    def percentile(self,p):
+
+        """Return the `p`-th percentile of the run times (nearest rank)."""
+
+        rank = max(1,-(-len(self.runs)*p // 100))
+        return self.runs[min(len(self.runs),int(rank))-1]
+
+    @property
+    def median(self):
+        n = len(self.runs)
+        if n % 2: return self.runs[n//2]
+        return (self.runs[n//2-1] + self.runs[n//2]) / 2
+
+    @property
+    def mean(self):
+        return sum(self.runs) / len(self.runs)
+
+    @property
+    def min(self):
+        return self.runs[0]
+
+    @property
+    def max(self):
+        return self.runs[-1]
+
+    def statistic(self,which):
+
+        """Return the statistic `which`: one of `"median"`, `"mean"`,
+        `"min"`, `"max"` or a number, which is taken as percentile.
+        """
+
+        if isinstance(which,str):
+            return getattr(self,which)
+        return self.percentile(which)
+
+    def __repr__(self):
+        return "Timing(runs={}, min={:.6f}, median={:.6f}, max={:.6f})".format(len(self.runs),self.min,self.median,self.max)
+
+def time_runs(thunk,repeat=None,warmup=None):
+
+    """Run `thunk` `warmup` times, then `repeat` times measuring the
+    wall clock time of every run and return the :py:class:`Timing`.
+    Exceptions raised by `thunk` are passed on.
+    """
+
+    repeat = default_repeat if repeat is None else repeat
+    warmup = default_warmup if warmup is None else warmup
+
+    for _ in range(warmup):
+        thunk()
+
+    runs  = []
+    clock = time.perf_counter
+    for _ in range(repeat):
+        started = clock()
+        thunk()
+        runs.append(clock() - started)
+    return Timing(runs)
+
+
+class Allocations(object):
+
+    """The memory allocated by a single run of a thunk as traced by
+    :py:mod:`tracemalloc`: the `peak` and `net` number of bytes
+    allocated, the (net) `count` of allocated blocks and the top
+    allocation `sites` still holding memory after the run (as strings
+    `file:line: size, count`). `peak_sites` are the top sites at the
+    peak, if they have been looked for (see :py:func:`peak_sites`).
+    """
+
+    __slots__ = ('peak','net','count','sites','peak_sites')
+
+    def __init__(self,peak,net,count,sites,peak_sites=None):
+        self.peak       = peak
+        self.net        = net
+        self.count      = count
+        self.sites      = sites
+        self.peak_sites = peak_sites
+
+    def measure(self,which):
+
+        """Return the measure `which`: one of `"peak"`, `"net"` or
+        `"count"`.
+        """
+
+        return getattr(self,which)
+
+    def sites_for(self,which):
+
+        """Return the sites explaining the measure `which`: those at
+        the peak for `"peak"` (if known), else the net ones."""
+
+        if which == "peak" and self.peak_sites is not None:
+            return self.peak_sites
+        return self.sites
+
+    def __repr__(self):
+        return "Allocations(peak={}, net={}, count={})".format(self.peak,self.net,self.count)
+
+def _untraced(tracemalloc):
+
+    # Allocations not to list: those of tracing and of the import
+    # machinery.
+
+    return (
+        tracemalloc.Filter(False,tracemalloc.__file__),
+        tracemalloc.Filter(False,__file__),
+        tracemalloc.Filter(False,"<frozen *>"),
+        tracemalloc.Filter(False,"*/importlib/*"),
+    )
+
+def _sites(stats,top):
+    return tuple(
+        "{}:{}: {} bytes, {} blocks".format(stat.traceback[0].filename,stat.traceback[0].lineno,stat.size_diff,stat.count_diff)
+        for stat in stats[:top] if stat.size_diff > 0
+    )
+
+def trace_allocations(thunk,warmup=None,top=5):
+
+    """Run `thunk` `warmup` times (so caches etc. are filled), then
+    once more under :py:mod:`tracemalloc` and return the
+    :py:class:`Allocations` of that run with the `top` (net)
+    allocation sites. Tracing is started (and stopped again) if it
+    isn't already. Exceptions raised by `thunk` are passed on.
+    """
+
+    import tracemalloc
+
+    warmup   = default_warmup if warmup is None else warmup
+    untraced = _untraced(tracemalloc)
+
+    for _ in range(warmup):
+        thunk()
+
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot().filter_traces(untraced)
+        base   = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        thunk()
+        current, peak = tracemalloc.get_traced_memory()
+        after  = tracemalloc.take_snapshot().filter_traces(untraced)
+    finally:
+        if started:
+            tracemalloc.stop()
+
+    stats = after.compare_to(before,'lineno')
+    return Allocations(peak-base,current-base,sum(stat.count_diff for stat in stats),_sites(stats,top))
+
+def peak_sites(thunk,top=5):
+
+    """Run `thunk` once more under :py:mod:`tracemalloc` and return
+    the `top` allocation sites at the peak of that run.
+
+    The memory in use is sampled whenever a function returns (with
+    :py:func:`sys.setprofile`, calling on to a profile function set
+    before) and a snapshot is taken each time it has grown by a
+    quarter since the last one. The snapshots themselves take memory,
+    so this is a separate run from :py:func:`trace_allocations`.
+    Temporary allocations freed before any function returns are not
+    seen.
+    """
+
+    import tracemalloc
+
+    untraced = _untraced(tracemalloc)
+    started  = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        before  = tracemalloc.take_snapshot().filter_traces(untraced)
+        base    = tracemalloc.get_traced_memory()[0]
+        highest = [ 0, None, 0 ]               # growth, snapshot and its size at the last sample
+        chained = sys.getprofile()
+
+        def sample(frame,event,argument):
+            if event in ("return","c_return"):
+                grown = tracemalloc.get_traced_memory()[0] - base - highest[2]
+                if grown > max(1024,highest[0] * 5 // 4):
+                    highest[:] = [ 0, None, 0 ]
+                    snapshot   = tracemalloc.take_snapshot()
+                    highest[:] = [ grown, snapshot, tracemalloc.get_traced_memory()[0] - base - grown ]
+            if chained is not None:
+                chained(frame,event,argument)
+
+        sys.setprofile(sample)
+        try:
+            thunk()
+        finally:
+            sys.setprofile(chained)
+        if tracemalloc.get_traced_memory()[0] - base - highest[2] >= highest[0]:
+            highest[1] = tracemalloc.take_snapshot()
+    finally:
+        if started:
+            tracemalloc.stop()
+
+    return _sites(highest[1].filter_traces(untraced).compare_to(before,'lineno'),top)
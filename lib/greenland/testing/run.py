@@ -0,0 +1,250 @@
+#
+#   Greenland -- a Python based scripting environment.
+#   Copyright (C) 2015-2017  M E Leypold.
+#
+#   This program is free software; you can redistribute it and/or
+#   modify it under the terms of the GNU General Public License as
+#   published by the Free Software Foundation; either version 2 of the
+#   License, or (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program; if not, write to the Free Software
+#   Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA
+#   02110-1301 USA.
+
+"""\
+
+A runner for test programs. Tests written with
+:py:mod:`greenland.testing.framework` are programs whose exit status
+matters, this runner finds them, runs them in parallel and reports
+which failed::
+
+    python -m greenland.testing.run [-j WORKERS] [--shard I/N] [--incremental] [DIRECTORY ...]
+
+Test programs are all files below the given directories (default:
+`tests`) without a `.py` suffix. They are run with the current
+interpreter in the current directory, with the current directory
+prepended to `PYTHONPATH` (so `import tests.local` works). The exit
+status of the runner is 0 if all programs passed.
+
+With `--incremental` the programs are run under
+:py:mod:`greenland.testing.track` and the files each program depends
+on (modules, data files and the programs it runs, also in the
+processes it starts) are recorded in a cache (`--cache`, default
+:py:data:`default_cache`). On the next run programs that passed are
+skipped if none of their files changed.
+
+"""
+
+import os
+import sys
+import time
+import zlib
+import json
+import argparse
+import tempfile
+import subprocess
+
+import greenland.testing.track as tracking
+
+from   concurrent.futures import ThreadPoolExecutor
+
+default_cache = os.path.join(".build","tests","dependencies.json")  #: Default dependency cache of incremental runs.
+
+
+class Outcome(object):
+
+    """The outcome of running the test program `path`: its
+    `returncode` (`None` if it timed out), `stderr`, the `duration`
+    (seconds), a short `summary` (the `ErrorsOccurred` lines or the
+    last line of `stderr`) and, if it has been tracked, the `files` it
+    loaded (else `None`)."""
+
+    __slots__ = ('path','returncode','stderr','duration','summary','files')
+
+    def __init__(self,path,returncode,stderr,duration,files=None):
+        self.path       = path
+        self.returncode = returncode
+        self.stderr     = stderr
+        self.duration   = duration
+        self.summary    = summarize(stderr)
+        self.files      = files
+
+    @property
+    def passed(self):
+        return self.returncode == 0
+
+    def __repr__(self):
+        return "Outcome({!r}, returncode={!r})".format(self.path,self.returncode)
+
+def summarize(stderr):
+
+    """Return the `ErrorsOccurred` lines of `stderr` or else its last
+    non empty line (`""` if there is none)."""
+
+    lines   = [ line.strip() for line in stderr.splitlines() if line.strip() ]
+    summary = [ line for line in lines if "ErrorsOccurred" in line ]
+    if summary:
+        return "\n".join(summary)
+    return lines[-1] if lines else ""
+
+
+def is_test_program(name):
+    return not (name.endswith(".py") or name.endswith(".pyc") or name.endswith("~") or name.startswith("."))
+
+def discover(*directories):
+
+    """Return the (sorted) paths of the test programs below
+    `directories` (default: `tests`). A path that is a file is taken
+    as it is."""
+
+    found = []
+    for directory in directories or ("tests",):
+        if os.path.isfile(directory):
+            found.append(directory)
+            continue
+        for base,subdirectories,files in os.walk(directory):
+            subdirectories[:] = [ d for d in subdirectories if not d.startswith(".") and d != "__pycache__" ]
+            found.extend( os.path.join(base,name) for name in files if is_test_program(name) )
+    return sorted(found)
+
+def shard(paths,index,count):
+
+    """Return the paths belonging to shard `index` of `count` (0 based).
+    Paths are assigned by a stable hash (CRC32) of their normalized
+    form, so every node of a fleet computes the same partition and a
+    program stays in its shard when others are added."""
+
+    return [ path for path in paths if zlib.crc32(os.path.normpath(path).replace(os.sep,"/").encode()) % count == index ]
+
+
+def environment():
+
+    """Return the environment for test programs: the current one with
+    the current directory and the directory greenland has been
+    imported from prepended to `PYTHONPATH` (the latter for
+    :py:mod:`greenland.testing.track`)."""
+
+    env  = dict(os.environ)
+    path = env.get("PYTHONPATH")
+    lib  = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env["PYTHONPATH"] = os.pathsep.join([ os.getcwd(), lib ] + ([ path ] if path else []))
+    return env
+
+def run_program(path,timeout=None,env=None,track=False):
+
+    """Run the test program `path` with the current interpreter and
+    return its :py:class:`Outcome`. If `track` is set, the files
+    loaded by the program are recorded (see
+    :py:mod:`greenland.testing.track`)."""
+
+    command = [ sys.executable, path ]
+    if track:
+        handle, output = tempfile.mkstemp(suffix=".json")
+        os.close(handle)
+        command[1:1] = [ "-m", "greenland.testing.track", output ]
+
+    started = time.perf_counter()
+    try:
+        process = subprocess.run(
+            command,stdin=subprocess.DEVNULL,stdout=subprocess.DEVNULL,stderr=subprocess.PIPE,
+            env=env or environment(),timeout=timeout
+        )
+        returncode, stderr = process.returncode, process.stderr
+    except subprocess.TimeoutExpired as timeout_expired:
+        returncode, stderr = None, (timeout_expired.stderr or b"") + "\ntimeout after {}s".format(timeout).encode()
+    duration = time.perf_counter() - started
+
+    files = None
+    if track:
+        try:
+            with open(output) as tracked:
+                files = json.load(tracked)
+        except ValueError:
+            pass                       # killed before writing
+        finally:
+            os.remove(output)
+            if os.path.exists(output + ".events"):
+                os.remove(output + ".events")
+    return Outcome(path,returncode,stderr.decode("utf-8","replace"),duration,files)
+
+def run(paths,workers=None,timeout=None,track=False):
+
+    """Run the test programs `paths`, `workers` at a time (default:
+    one per CPU) and yield their :py:class:`Outcome` in the order of
+    `paths`."""
+
+    env = environment()
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor:
+        futures = [ executor.submit(run_program,path,timeout,env,track) for path in paths ]
+        for future in futures:
+            yield future.result()
+
+
+def parse_shard(text):
+    try:
+        index, count = ( int(n) for n in text.split("/") )
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected I/N, e.g. 0/4, not {!r}".format(text))
+    if not 0 <= index < count:
+        raise argparse.ArgumentTypeError("shard index must be in 0..N-1: {!r}".format(text))
+    return index, count
+
+def main(argv=None,output=sys.stdout):
+
+    """The command line interface, see the module documentation.
+    Returns the exit status."""
+
+    parser = argparse.ArgumentParser(prog="python -m greenland.testing.run",description="Run test programs.")
+    parser.add_argument("directories",nargs="*",default=["tests"],help="directories to search for test programs (default: tests)")
+    parser.add_argument("-j","--workers",type=int,default=None,help="number of programs to run in parallel (default: one per CPU)")
+    parser.add_argument("--shard",type=parse_shard,default=None,metavar="I/N",help="only run shard I (0 based) of N")
+    parser.add_argument("--timeout",type=float,default=None,help="timeout per program in seconds")
+    parser.add_argument("-v","--verbose",action="store_true",help="print the stderr of failed programs")
+    parser.add_argument("--incremental",action="store_true",help="skip programs that passed and whose files did not change")
+    parser.add_argument("--cache",default=default_cache,help="dependency cache for --incremental (default: {})".format(default_cache))
+    options = parser.parse_args(argv)
+
+    paths = discover(*options.directories)
+    if options.shard:
+        paths = shard(paths,*options.shard)
+
+    skipped = []
+    if options.incremental:
+        dependencies = tracking.Dependencies(options.cache)
+        skipped      = [ path for path in paths if dependencies.unchanged(os.path.normpath(path)) ]
+        paths        = [ path for path in paths if path not in skipped ]
+        for path in skipped:
+            print("{:<60} unchanged".format(path),file=output)
+
+    failed  = []
+    started = time.perf_counter()
+    for outcome in run(paths,options.workers,options.timeout,track=options.incremental):
+        if options.incremental:
+            dependencies.record(os.path.normpath(outcome.path),outcome.files,outcome.passed)
+        status = "ok" if outcome.passed else ("TIMEOUT" if outcome.returncode is None else "FAILED ({})".format(outcome.returncode))
+        print("{:<60} {} {:.2f}s".format(outcome.path,status,outcome.duration),file=output)
+        if not outcome.passed:
+            failed.append(outcome)
+            if options.verbose:
+                print("  " + outcome.stderr.rstrip().replace("\n","\n  "),file=output)
+            elif outcome.summary:
+                print("  " + outcome.summary.replace("\n","\n  "),file=output)
+
+    if options.incremental:
+        dependencies.save()
+
+    print(file=output)
+    print("{} programs, {} failed in {:.2f}s".format(len(paths),len(failed),time.perf_counter()-started)
+          + (", {} unchanged skipped".format(len(skipped)) if skipped else ""),file=output)
+    for outcome in failed:
+        print("  failed: {}".format(outcome.path),file=output)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,198 @@
+#
+#   Greenland -- a Python based scripting environment.
+#   Copyright (C) 2015-2017  M E Leypold.
+#
+#   This program is free software; you can redistribute it and/or
+#   modify it under the terms of the GNU General Public License as
+#   published by the Free Software Foundation; either version 2 of the
+#   License, or (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program; if not, write to the Free Software
+#   Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA
+#   02110-1301 USA.
+
+"""\
+
+Sinks for :py:class:`~greenland.testing.expectations.Recorder`
+events, that stream the results of a test program in a machine
+readable format (JSON Lines, JUnit XML) while it runs.
+
+A recorder calls the sinks given to it as
+
+- :py:meth:`Sink.started` when an expectation is about to be checked,
+- :py:meth:`Sink.passed` when it has been met,
+- :py:meth:`Sink.failed` when a failure is reported,
+- :py:meth:`Sink.flush` when that failure stops the program and
+- :py:meth:`Sink.close` when the recorder is closed.
+
+Output is buffered and written every :py:attr:`BufferedSink.flush_every`
+events or :py:attr:`BufferedSink.flush_interval` seconds, so neither
+every event costs a write nor the events of a long run pile up in
+memory. A buffered sink that has not been closed is closed when the
+interpreter exits, so a report is complete even if a failure ended
+the program before :py:meth:`~greenland.testing.expectations.Recorder.done`.
+
+"""
+
+import json
+import time
+import atexit
+import threading
+
+from xml.sax.saxutils import escape, quoteattr
+
+
+class Sink(object):
+
+    """Base class of sinks: ignores all events."""
+
+    def started(self,location):
+        pass
+
+    def passed(self,location,duration=None):
+        pass
+
+    def failed(self,location,failure,duration=None):
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class BufferedSink(Sink):
+
+    """A sink writing text records to `file` (a path or a file object
+    which is then not closed by :py:meth:`close`). Subclasses render
+    events with :py:meth:`write`."""
+
+    flush_every    = 100    #: Number of buffered records that triggers a write.
+    flush_interval = 1.0    #: Time (seconds) after which buffered records are written.
+
+    def __init__(self,file,flush_every=None,flush_interval=None):
+        if isinstance(file,str):
+            self.file, self.owned = open(file,"w"), True
+        else:
+            self.file, self.owned = file, False
+        if flush_every is not None:
+            self.flush_every = flush_every
+        if flush_interval is not None:
+            self.flush_interval = flush_interval
+        self.lock    = threading.Lock()
+        self.buffer  = []
+        self.flushed = time.monotonic()
+        self.closed  = False
+        atexit.register(self.close)
+
+    def write(self,record):
+
+        """Buffer the text `record` and write the buffer if it is due."""
+
+        with self.lock:
+            self.buffer.append(record)
+            if len(self.buffer) >= self.flush_every or time.monotonic() - self.flushed >= self.flush_interval:
+                self._flush()
+
+    def flush(self):
+        with self.lock:
+            self._flush()
+
+    def _flush(self):
+        if self.buffer:
+            self.file.write("".join(self.buffer))
+            self.buffer.clear()
+        self.file.flush()
+        self.flushed = time.monotonic()
+
+    def close(self):
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+            atexit.unregister(self.close)
+            self._close()
+            self._flush()
+            if self.owned:
+                self.file.close()
+
+    def _close(self):
+        pass
+
+
+def _where(location):
+    if location is None:
+        return None, None
+    return location.file, location.line
+
+class JSONLinesSink(BufferedSink):
+
+    """Write one JSON object per event and line, with the keys `event`
+    (`"started"`, `"passed"` or `"failed"`), `file`, `line`, `time`
+    (seconds since the epoch) and, for passed and failed
+    expectations, `duration` (seconds, `null` if not measured). Failed
+    events also have the keys `failure` (the class name), `message`,
+    `expected` and `actual` (the bounded reprs of a
+    :py:class:`~greenland.testing.expectations.TestFailure`).
+    """
+
+    def emit(self,event,location,**data):
+        file, line = _where(location)
+        record = { 'event': event, 'file': file, 'line': line, 'time': time.time() }
+        record.update(data)
+        self.write(json.dumps(record) + "\n")
+
+    def started(self,location):
+        self.emit('started',location)
+
+    def passed(self,location,duration=None):
+        self.emit('passed',location,duration=duration)
+
+    def failed(self,location,failure,duration=None):
+        self.emit(
+            'failed',location,duration=duration,
+            failure  = failure.__class__.__name__,
+            message  = failure.get_message(),
+            expected = getattr(failure,'expected_repr',None),
+            actual   = getattr(failure,'actual_repr',None),
+        )
+
+
+class JUnitXMLSink(BufferedSink):
+
+    """Write a JUnit XML report with one `testcase` per checked
+    expectation (named after its location). Since test cases are
+    written as they come in, the `testsuite` element carries no
+    counts."""
+
+    def __init__(self,file,name="greenland",flush_every=None,flush_interval=None):
+        super(JUnitXMLSink,self).__init__(file,flush_every,flush_interval)
+        self.write('<?xml version="1.0" encoding="UTF-8"?>\n<testsuites>\n<testsuite name={}>\n'.format(quoteattr(name)))
+
+    def testcase(self,location,duration,body=""):
+        file, line = _where(location)
+        attributes = 'classname={} name={}'.format(quoteattr(str(file)),quoteattr("{}:{}".format(file,line)))
+        if duration is not None:
+            attributes += ' time="{:.6f}"'.format(duration)
+        if body:
+            self.write('<testcase {}>{}</testcase>\n'.format(attributes,body))
+        else:
+            self.write('<testcase {}/>\n'.format(attributes))
+
+    def passed(self,location,duration=None):
+        self.testcase(location,duration)
+
+    def failed(self,location,failure,duration=None):
+        self.testcase(location,duration,'<failure type={} message={}>{}</failure>'.format(
+            quoteattr(failure.__class__.__name__),quoteattr(failure.get_message()),escape(str(failure))
+        ))
+
+    def _close(self):
+        self.buffer.append('</testsuite>\n</testsuites>\n')
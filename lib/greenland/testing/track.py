@@ -0,0 +1,204 @@
+#
+#   Greenland -- a Python based scripting environment.
+#   Copyright (C) 2015-2017  M E Leypold.
+#
+#   This program is free software; you can redistribute it and/or
+#   modify it under the terms of the GNU General Public License as
+#   published by the Free Software Foundation; either version 2 of the
+#   License, or (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program; if not, write to the Free Software
+#   Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA
+#   02110-1301 USA.
+
+"""\
+
+Dependency tracking for test programs, the basis of the incremental
+mode of :py:mod:`greenland.testing.run`.
+
+Running a program as ::
+
+    python -m greenland.testing.track OUTPUT PROGRAM [ARGUMENT ...]
+
+runs `PROGRAM` as `__main__` and, when it exits, writes the list of
+files below the current directory it depends on as JSON to `OUTPUT`:
+the program itself, the source files of the modules it has loaded,
+the files and directories it has read or listed and the programs it
+has executed -- and the same for every process it has started.
+
+Processes are followed by an audit hook (see :py:func:`sys.addaudithook`):
+forked children inherit it, Python interpreters started by the program
+import it on start up from :py:data:`site`, which is put on
+`PYTHONPATH`. If the program starts a process with an environment
+that drops the hook, the list is `null` (unknown): such a program is
+always run again.
+
+:py:class:`Dependencies` keeps these lists in a cache, together with
+hashes of the files, and tells which programs have to be run again
+since one of their files changed.
+
+"""
+
+import os
+import sys
+import json
+import runpy
+import hashlib
+
+site = os.path.join(os.path.dirname(os.path.abspath(__file__)),"track_site")  #: Directory of the `sitecustomize` following child interpreters.
+
+def loaded_files(root):
+
+    """Return the (sorted, relative) paths of the source files of
+    the loaded modules below `root`."""
+
+    root  = os.path.abspath(root)
+    files = set()
+    for module in list(sys.modules.values()):
+        path = getattr(module,'__file__',None)
+        if not path: continue
+        path = os.path.abspath(path)
+        if path.startswith(root + os.sep):
+            files.add(os.path.relpath(path,root))
+    return sorted(files)
+
+def followed(report,root):
+
+    """Return the (sorted, relative) paths below `root` that have been
+    read, listed or executed, but not written, according to the
+    `report` of the audit hook, `None` if a process has been started
+    that could not be followed."""
+
+    root          = os.path.abspath(root)
+    read, written = set(), set()
+    with open(report,encoding="utf-8",errors="surrogateescape") as lines:
+        for line in lines:
+            kind, path = line[0], line[1:].rstrip("\n")
+            if kind == "!":
+                return None
+            (read if kind == "+" else written).add(path)
+    return sorted( os.path.relpath(path,root) for path in read - written - { report }
+                   if path.startswith(root + os.sep) )
+
+def _hook():
+
+    # The module in `site` under another name: the sitecustomize of
+    # this process may be a different one.
+
+    import importlib.util
+    spec   = importlib.util.spec_from_file_location(__name__ + "_site",os.path.join(site,"sitecustomize.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def track(output,program,arguments=()):
+
+    """Run `program` (with `arguments`) as `__main__` and write the
+    files it and the processes it starts depend on to `output` (see
+    :py:func:`loaded_files` and :py:func:`followed`), whichever way
+    it terminates."""
+
+    root   = os.getcwd()
+    report = os.path.abspath(output) + ".events"
+    hook   = _hook()
+    for name, entry in ((hook.variable,report),("PYTHONPATH",site)):
+        os.environ[name] = os.pathsep.join( part for part in (entry,os.environ.get(name)) if part )
+    hook.follow(report)
+
+    sys.argv    = [ program ] + list(arguments)
+    sys.path[0:1] = [ os.path.dirname(os.path.abspath(program)), site ]     # as in an interpreter started now
+    try:
+        runpy.run_path(program,run_name="__main__")
+    finally:
+        files = followed(report,root)
+        if files is not None:
+            files = sorted(set( files + loaded_files(root) + [ os.path.relpath(os.path.abspath(program),root) ] ))
+        with open(output,"w") as out:
+            json.dump(files,out)
+        os.remove(report)
+
+
+def digest(path):
+
+    """Return the SHA-1 of the contents of `path` (of the sorted names
+    in it, if it is a directory; `None` if it doesn't exist)."""
+
+    if os.path.isdir(path):
+        return hashlib.sha1("\0".join(sorted(os.listdir(path))).encode("utf-8","surrogateescape")).hexdigest()
+    try:
+        with open(path,"rb") as file:
+            return hashlib.sha1(file.read()).hexdigest()
+    except OSError:
+        return None
+
+class Dependencies(object):
+
+    """A cache (a JSON file at `path`) of the files each test program
+    depends on, with their hashes at the last passing run. File
+    hashes are computed at most once per instance."""
+
+    version = 2   #: Format version, caches of other versions are discarded.
+
+    def __init__(self,path):
+        self.path     = path
+        self.programs = {}
+        self.digests  = {}
+        try:
+            with open(path) as file:
+                cache = json.load(file)
+            if cache.get('version') == self.version and cache.get('interpreter') == sys.version:
+                self.programs = cache['programs']
+        except (OSError,ValueError):
+            pass
+
+    def digest(self,path):
+        try:
+            return self.digests[path]
+        except KeyError:
+            value = self.digests[path] = digest(path)
+            return value
+
+    def unchanged(self,program):
+
+        """Return if `program` passed at its last recorded run and none
+        of its files has changed since."""
+
+        entry = self.programs.get(program)
+        if not entry or not entry['passed']:
+            return False
+        return all( self.digest(path) == value for path,value in entry['files'].items() )
+
+    def record(self,program,files,passed):
+
+        """Record the `files` `program` loaded (`None` if unknown) and
+        if it `passed`."""
+
+        if files is None:
+            self.programs.pop(program,None)
+            return
+        self.programs[program] = {
+            'passed' : passed,
+            'files'  : { path: self.digest(path) for path in files },
+        }
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory,exist_ok=True)
+        temporary = self.path + "~"
+        with open(temporary,"w") as file:
+            json.dump({ 'version': self.version, 'interpreter': sys.version, 'programs': self.programs },file,indent=1,sort_keys=True)
+        os.replace(temporary,self.path)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("usage: python -m greenland.testing.track OUTPUT PROGRAM [ARGUMENT ...]",file=sys.stderr)
+        sys.exit(2)
+    track(sys.argv[1],sys.argv[2],sys.argv[3:])
@@ -0,0 +1,146 @@
+#
+#   Greenland -- a Python based scripting environment.
+#   Copyright (C) 2015-2017  M E Leypold.
+#
+#   This program is free software; you can redistribute it and/or
+#   modify it under the terms of the GNU General Public License as
+#   published by the Free Software Foundation; either version 2 of the
+#   License, or (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#   General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program; if not, write to the Free Software
+#   Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA
+#   02110-1301 USA.
+
+"""\
+
+The audit hook of :py:mod:`greenland.testing.track`. This directory
+is put on `PYTHONPATH` of a tracked program, so every interpreter it
+starts imports this module on start up and follows the reports
+named in the environment variable :py:data:`variable`.
+
+Only `os` and `sys` are used here: this module is imported by every
+child interpreter, and must neither change what they import nor
+import greenland.
+
+"""
+
+import os
+import sys
+
+variable = "GREENLAND_TRACK"   #: Environment variable with the reports to append to (separated by `os.pathsep`).
+
+_writing = os.O_WRONLY | os.O_RDWR | os.O_CREAT | os.O_TRUNC | os.O_APPEND
+
+def _source(path):
+
+    # The source file of a cached module, else `path`.
+
+    directory, name = os.path.split(path)
+    if name.endswith(".pyc") and os.path.basename(directory) == "__pycache__":
+        return os.path.join(os.path.dirname(directory),name.split(".")[0] + ".py")
+    return path
+
+def follow(report):
+
+    """Append the files this process (and its forked children) reads,
+    writes or executes to the file `report`, one per line: `+PATH`
+    for files read, listed directories and executed programs, `-PATH`
+    for files written. A line `!EVENT` tells that the process started
+    a program that can not be followed (see
+    :py:func:`greenland.testing.track.followed`)."""
+
+    here       = os.path.dirname(os.path.abspath(__file__))
+    descriptor = os.open(report,os.O_WRONLY | os.O_APPEND | os.O_CREAT,0o644)
+    installed  = tuple(set( os.path.join(os.path.abspath(prefix),"")
+                            for prefix in (sys.prefix,sys.base_prefix,sys.exec_prefix,sys.base_exec_prefix) ))
+    seen       = set()
+
+    def note(kind,path,cwd=None):
+        if isinstance(path,int): return
+        try:
+            path = os.fsdecode(path)
+            if cwd is not None:
+                path = os.path.join(os.fsdecode(cwd),path)
+            path = os.path.abspath(path)
+        except (TypeError,ValueError):
+            return
+        if path.startswith(installed) or kind + path in seen: return
+        seen.add(kind + path)
+        os.write(descriptor,(kind + path + "\n").encode("utf-8","surrogateescape"))
+
+    def executed(arguments,env,cwd=None):
+        if isinstance(arguments,(str,bytes,os.PathLike)):
+            arguments = [ arguments ]
+        for argument in arguments or ():
+            if isinstance(argument,os.PathLike):
+                argument = os.fspath(argument)
+            for word in argument.split():           # also the words of a shell command
+                if os.path.isfile(os.path.join(os.fsdecode(cwd or "."),os.fsdecode(word))):
+                    note("+",word,cwd)
+        if env is not None:
+            reports = os.fsdecode(env.get(variable,env.get(variable.encode(),"")))
+            path    = os.fsdecode(env.get("PYTHONPATH",env.get(b"PYTHONPATH","")))
+            if report not in reports.split(os.pathsep) or here not in map(os.path.abspath,path.split(os.pathsep)):
+                note("!","untracked environment")
+
+    def hook(event,arguments):
+        try:
+            observe(event,arguments)
+        except Exception:                    # never fail the observed operation
+            pass
+
+    def observe(event,arguments):
+        if event == "open":
+            path, mode, flags = arguments
+            if path is None: return
+            if mode is None:
+                written = flags & _writing
+            else:
+                written = any( c in mode for c in "wax+" )
+            if written:
+                note("-",path)
+            elif not isinstance(path,int):
+                note("+",_source(os.fsdecode(path)))
+        elif event in ("os.listdir","os.scandir"):
+            note("+",arguments[0] if arguments[0] is not None else ".")
+        elif event == "subprocess.Popen":
+            _, command, cwd, env = arguments
+            executed(command,env,cwd)
+        elif event in ("os.exec","os.posix_spawn"):
+            executed(arguments[1],arguments[2])
+        elif event == "os.spawn":
+            executed(arguments[2],arguments[3])
+        elif event == "os.system":
+            executed(arguments[0],None)
+
+    sys.addaudithook(hook)
+
+def _chain():
+
+    # Import the sitecustomize this module shadows, if there is one.
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    path = list(sys.path)
+    sys.path[:] = [ entry for entry in path if os.path.abspath(entry or ".") != here ]
+    del sys.modules[__name__]
+    try:
+        import sitecustomize
+    except ImportError:
+        pass
+    finally:
+        sys.path[:] = path
+
+if __name__ == "sitecustomize":
+    for _report in os.environ.get(variable,"").split(os.pathsep):
+        if _report:
+            try:
+                follow(_report)
+            except OSError:
+                pass
+    _chain()